@@ -0,0 +1,220 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process';
+import os from 'os';
+import path from 'path';
+import readline from 'readline';
+import { log } from './vite';
+
+const PYTHON_SCRIPT = path.join(process.cwd(), 'server', 'python', 'wrapper.py');
+// Keep in sync with default_worker_count() in wrapper.py
+const WORKER_COUNT = Math.max(1, Number(process.env.RESUME_EXTRACT_WORKERS) || Math.min(4, os.cpus().length));
+const JOB_TIMEOUT_MS = Number(process.env.RESUME_EXTRACT_TIMEOUT_MS) || 120_000;
+
+export interface ExtractionResult {
+  success?: boolean;
+  text?: string;
+  error?: string;
+  [key: string]: unknown;
+}
+
+/** A file on disk, or the upload bytes themselves plus the original file name */
+export type ExtractionInput = { path: string } | { data: Buffer; name: string };
+
+/** One page emitted by a streaming job before its final result */
+export interface ExtractedPage {
+  page: number;
+  text: string;
+  engine?: string;
+  seconds?: number;
+}
+
+export interface ExtractionOptions {
+  /** Emit pages as they are read; the final result then carries counts instead of text */
+  stream?: boolean;
+  maxPages?: number;
+  maxChars?: number;
+  /** Stop a streamed PDF once the worker has grown by this many MB (checked between pages) */
+  memoryLimitMb?: number;
+  onPage?: (page: ExtractedPage) => void;
+  /** Diff a DOCX upload against this resume's last version; the result gets `changes` */
+  resumeId?: string | number;
+}
+
+interface PendingJob {
+  onPage?: (page: ExtractedPage) => void;
+  resolve: (result: ExtractionResult) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface Worker {
+  process: ChildProcessWithoutNullStreams;
+  pending: Map<string, PendingJob>;
+  ready: Promise<void>;
+}
+
+const workers: Worker[] = [];
+let nextJobId = 0;
+
+/**
+ * Start a resident `wrapper.py serve` process that reads one JSON job per line
+ * and answers with one JSON result per line
+ */
+function startWorker(): Worker {
+  const child = spawn('python3', [PYTHON_SCRIPT, 'serve'], { stdio: ['pipe', 'pipe', 'pipe'] });
+  const pending = new Map<string, PendingJob>();
+
+  let started = false;
+  let markReady: () => void = () => {};
+  let markFailed: (error: Error) => void = () => {};
+  const ready = new Promise<void>((resolve, reject) => {
+    markReady = resolve;
+    markFailed = reject;
+  });
+  // Avoid unhandled rejections when nothing is waiting on this worker yet
+  ready.catch(() => {});
+
+  const worker: Worker = { process: child, pending, ready };
+
+  const failPending = (error: Error) => {
+    for (const job of Array.from(pending.values())) {
+      clearTimeout(job.timer);
+      job.reject(error);
+    }
+    pending.clear();
+  };
+
+  readline.createInterface({ input: child.stdout }).on('line', (line) => {
+    let message: ExtractionResult & { id?: string; ready?: boolean; partial?: boolean };
+    try {
+      message = JSON.parse(line);
+    } catch {
+      log(`Ignoring non-JSON output from extraction worker: ${line}`, 'extraction-pool');
+      return;
+    }
+
+    if (message.ready) {
+      started = true;
+      markReady();
+      return;
+    }
+
+    const job = message.id !== undefined ? pending.get(String(message.id)) : undefined;
+    if (!job) {
+      return;
+    }
+
+    if (message.partial) {
+      const { id: _id, partial: _partial, ...page } = message;
+      job.onPage?.(page as unknown as ExtractedPage);
+      return;
+    }
+
+    clearTimeout(job.timer);
+    pending.delete(String(message.id));
+    const { id: _id, ...result } = message;
+    job.resolve(result);
+  });
+
+  child.stderr.on('data', (data) => {
+    log(`Warning from Python worker ${child.pid}: ${data.toString().trim()}`, 'extraction-pool');
+  });
+
+  child.on('error', (error) => {
+    log(`Extraction worker failed to start: ${error}`, 'extraction-pool');
+    markFailed(error);
+  });
+
+  // Writing to a worker that just died raises EPIPE here; unhandled, it would take down the server
+  child.stdin.on('error', (error) => {
+    log(`Extraction worker ${child.pid} stopped accepting jobs: ${error}`, 'extraction-pool');
+    failPending(new Error('Extraction worker exited before finishing the job'));
+  });
+
+  child.on('exit', (code, signal) => {
+    log(`Extraction worker ${child.pid} exited (code ${code}, signal ${signal})`, 'extraction-pool');
+    markFailed(new Error('Extraction worker exited during startup'));
+    failPending(new Error('Extraction worker exited before finishing the job'));
+
+    // Replace the dead worker so the pool stays warm; a worker that never
+    // became ready is dropped instead so a broken install doesn't respawn forever
+    const index = workers.indexOf(worker);
+    if (index !== -1) {
+      if (started) {
+        workers[index] = startWorker();
+      } else {
+        workers.splice(index, 1);
+      }
+    }
+  });
+
+  return worker;
+}
+
+function ensureWorkers() {
+  while (workers.length < WORKER_COUNT) {
+    workers.push(startWorker());
+  }
+}
+
+/** False once the process has exited or its stdin closed, possibly before its 'exit' event ran */
+function isAlive(worker: Worker): boolean {
+  const child = worker.process;
+  return child.exitCode === null && child.signalCode === null && !child.killed && child.stdin.writable;
+}
+
+function leastBusyWorker(): Worker {
+  ensureWorkers();
+  // Replace workers that died but whose 'exit' handler hasn't run yet; it skips them once replaced
+  for (let index = 0; index < workers.length; index++) {
+    if (!isAlive(workers[index])) {
+      workers[index] = startWorker();
+    }
+  }
+  return workers.reduce((best, worker) => (worker.pending.size < best.pending.size ? worker : best));
+}
+
+/**
+ * Run a wrapper.py command on one of the warm extraction workers
+ * @param command Command name understood by wrapper.py (e.g. extract_text)
+ * @param input Path to the uploaded file, or its bytes sent inline so nothing is written to disk
+ * @param options Streaming mode: pages are passed to onPage as wrapper.py reads them
+ * @returns The JSON result produced by wrapper.py
+ */
+export async function runExtractionJob(
+  command: string,
+  input: ExtractionInput,
+  options: ExtractionOptions = {},
+): Promise<ExtractionResult> {
+  const worker = leastBusyWorker();
+  await worker.ready;
+  if (!isAlive(worker)) {
+    // It died while we waited; nothing would ever answer the job
+    throw new Error('Extraction worker exited before the job was sent');
+  }
+
+  const id = String(++nextJobId);
+  return new Promise<ExtractionResult>((resolve, reject) => {
+    const timer = setTimeout(() => {
+      worker.pending.delete(id);
+      reject(new Error(`Extraction job ${id} timed out after ${JOB_TIMEOUT_MS}ms`));
+      // A stuck job would block the worker's queue, so recycle the process
+      worker.process.kill();
+    }, JOB_TIMEOUT_MS);
+
+    worker.pending.set(id, { onPage: options.onPage, resolve, reject, timer });
+    const source = 'data' in input
+      ? { data: input.data.toString('base64'), name: input.name }
+      : { path: input.path };
+    const streaming = options.stream
+      ? {
+          stream: true,
+          max_pages: options.maxPages,
+          max_chars: options.maxChars,
+          memory_limit_mb: options.memoryLimitMb,
+        }
+      : {};
+    worker.process.stdin.write(
+      JSON.stringify({ id, command, ...source, ...streaming, resume_id: options.resumeId }) + '\n',
+    );
+  });
+}
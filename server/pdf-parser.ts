@@ -3,6 +3,7 @@ import fs from 'fs';
 import path from 'path';
 import { promisify } from 'util';
 import { log } from './vite';
+import { runExtractionJob } from './extraction-pool';
 
 const execPromise = promisify(exec);
 const writeFilePromise = promisify(fs.writeFile);
@@ -12,6 +13,21 @@ const unlinkPromise = promisify(fs.unlink);
 const UPLOAD_DIR = path.join(process.cwd(), 'uploads');
 const PYTHON_SCRIPT = path.join(process.cwd(), 'server', 'python', 'wrapper.py');
 
+/**
+ * The extraction tools are at capacity (wrapper.py's scheduler turned the job away);
+ * the upload should be retried after retryAfter seconds rather than parsed some other way
+ */
+export class ExtractionBusyError extends Error {
+  constructor(message: string, public retryAfter: number) {
+    super(message);
+    this.name = 'ExtractionBusyError';
+  }
+}
+
+function busyError(result: { error?: string; retry_after?: unknown }) {
+  return new ExtractionBusyError(result.error || 'Extraction server busy', Number(result.retry_after) || 5);
+}
+
 // Ensure upload directory exists
 async function ensureUploadDir() {
   try {
@@ -23,6 +39,27 @@ async function ensureUploadDir() {
   }
 }
 
+/**
+ * Extract text with a warm wrapper.py worker, falling back to a one-off process
+ * if the worker pool is unavailable
+ */
+async function runPythonExtraction(filePath: string) {
+  try {
+    return await runExtractionJob('extract_text', { path: filePath });
+  } catch (workerError) {
+    log(`Extraction worker unavailable, spawning wrapper.py: ${workerError}`, 'pdf-parser');
+  }
+
+  const { stdout, stderr } = await execPromise(`python3 ${PYTHON_SCRIPT} extract_text ${filePath}`);
+  
+  if (stderr) {
+    log(`Warning from Python script: ${stderr}`, 'pdf-parser');
+  }
+  
+  // Parse the output - expecting JSON
+  return JSON.parse(stdout);
+}
+
 /**
  * Parse resume file using Python script
  * @param file Buffer containing file data
@@ -30,6 +67,34 @@ async function ensureUploadDir() {
  * @returns Extracted text from resume
  */
 export async function parseResume(file: Buffer, originalFileName: string): Promise<string> {
+  // Fast path: hand the upload to a warm worker in memory, without a round-trip through uploads/
+  let workerAnswered = false;
+  try {
+    const result = await runExtractionJob('extract_text', { data: file, name: path.basename(originalFileName) });
+    workerAnswered = true;
+    
+    if (result.metrics) {
+      log(`Extraction metrics: ${JSON.stringify(result.metrics)}`, 'pdf-parser');
+    }
+    
+    if (result.busy) {
+      throw busyError(result);
+    }
+    
+    if (result.success && result.text) {
+      log(`Successfully extracted text in memory using Python worker`, 'pdf-parser');
+      return result.text;
+    }
+    
+    log(`In-memory extraction returned no text: ${result.error}`, 'pdf-parser');
+  } catch (workerError) {
+    // Falling back to other tools would add exactly the load the scheduler is shedding
+    if (workerError instanceof ExtractionBusyError) {
+      throw workerError;
+    }
+    log(`In-memory extraction failed: ${workerError}`, 'pdf-parser');
+  }
+  
   await ensureUploadDir();
   
   // Create a temporary file
@@ -44,14 +109,20 @@ export async function parseResume(file: Buffer, originalFileName: string): Promi
     
     // First attempt: Try using our Python script with improved parsing
     try {
-      const { stdout, stderr } = await execPromise(`python3 ${PYTHON_SCRIPT} extract_text ${filePath}`);
+      // The worker already ran the full Python pipeline on these bytes
+      if (workerAnswered) {
+        throw new Error('Python extraction already failed in memory');
+      }
+      
+      const result = await runPythonExtraction(filePath);
       
-      if (stderr) {
-        log(`Warning from Python script: ${stderr}`, 'pdf-parser');
+      if (result.metrics) {
+        log(`Extraction metrics: ${JSON.stringify(result.metrics)}`, 'pdf-parser');
       }
       
-      // Parse the output - expecting JSON
-      const result = JSON.parse(stdout);
+      if (result.busy) {
+        throw busyError(result);
+      }
       
       if (result.error) {
         throw new Error(`Python script error: ${result.error}`);
@@ -64,6 +135,9 @@ export async function parseResume(file: Buffer, originalFileName: string): Promi
       
       throw new Error('No text was extracted from the resume');
     } catch (pythonError) {
+      if (pythonError instanceof ExtractionBusyError) {
+        throw pythonError;
+      }
       log(`Python extraction failed: ${pythonError}`, 'pdf-parser');
       log(`Trying alternative extraction method...`, 'pdf-parser');
       
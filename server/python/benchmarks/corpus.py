@@ -0,0 +1,153 @@
+# corpus.py - Deterministic synthetic resume corpus for the extraction benchmarks
+
+import zlib
+import random
+import pathlib
+
+WORDS = (
+    "managed migrated optimized deployed automated designed led built reduced improved "
+    "Linux AWS Terraform Docker Kubernetes Python JavaScript SQL Nginx Apache WordPress "
+    "infrastructure reliability performance security customers servers pipelines latency "
+    "support engineer consultant team platform monitoring incidents budgets releases"
+).split()
+
+SECTIONS = ("Summary", "Work Experience", "Skills", "Education", "Certifications")
+
+def resume_lines(rng, count):
+    """Generate resume-like lines: section headings, job titles and bullets"""
+    lines = []
+    for index in range(count):
+        if index % 25 == 0:
+            lines.append(rng.choice(SECTIONS))
+        elif index % 25 == 1:
+            lines.append(f"Senior {rng.choice(WORDS).title()} Engineer  Jan '{rng.randint(10, 23)} - Present")
+        else:
+            lines.append("- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))))
+    return lines
+
+def pdf_string(text):
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def write_pdf(path, page_streams, resources, extra_objects=()):
+    """Write a minimal PDF whose pages share one resources dictionary.
+
+    extra_objects are object bodies numbered from 3 upwards so resources can
+    reference them; pages and their content streams are appended after them.
+    """
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>"}
+    number = 3
+    for body in extra_objects:
+        objects[number] = body
+        number += 1
+
+    kids = []
+    for stream in page_streams:
+        objects[number] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[number + 1] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                               f"/Resources {resources} /Contents {number} 0 R >>").encode()
+        kids.append(f"{number + 1} 0 R")
+        number += 2
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_number in sorted(objects):
+        offsets[object_number] = len(output)
+        output += b"%d 0 obj\n" % object_number + objects[object_number] + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_number in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[object_number]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    pathlib.Path(path).write_bytes(bytes(output))
+
+def text_page_stream(lines, show):
+    body = "\n".join(f"{show(line)} T*" for line in lines)
+    return f"BT /F1 9 Tf 40 760 Td 12 TL\n{body}\nET".encode("latin-1")
+
+def write_text_pdf(path, pages, rng):
+    """PDF with a normal text layer in a standard Type1 font"""
+    streams = [text_page_stream(resume_lines(rng, 55), lambda line: f"{pdf_string(line)} Tj")
+               for _ in range(pages)]
+    font = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    write_pdf(path, streams, "<< /Font << /F1 3 0 R >> >>", [font])
+
+def write_cid_pdf(path, pages, rng):
+    """PDF whose Identity-H font has no ToUnicode map, so extractors emit (cid:N)"""
+    def show(line):
+        return "<" + "".join(f"{ord(char):04X}" for char in line) + "> Tj"
+    streams = [text_page_stream(resume_lines(rng, 55), show) for _ in range(pages)]
+    font = (b"<< /Type /Font /Subtype /Type0 /BaseFont /Arial /Encoding /Identity-H "
+            b"/DescendantFonts [4 0 R] >>")
+    descendant = (b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Arial "
+                  b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+                  b"/FontDescriptor 5 0 R /DW 500 >>")
+    descriptor = (b"<< /Type /FontDescriptor /FontName /Arial /Flags 32 /FontBBox [0 -200 1000 900] "
+                  b"/ItalicAngle 0 /Ascent 900 /Descent -200 /CapHeight 700 /StemV 80 >>")
+    write_pdf(path, streams, "<< /Font << /F1 3 0 R >> >>", [font, descendant, descriptor])
+
+def write_image_pdf(path, pages, rng, width=850, height=1100):
+    """Scanned-style PDF: one grayscale image per page and no text layer"""
+    rows = []
+    for y in range(height):
+        # Horizontal bands of noise roughly where text lines would be
+        if y % 24 < 10 and 60 < y < height - 60:
+            rows.append(b"\x00" + bytes(rng.choice((0, 255, 255)) for _ in range(width)))
+        else:
+            rows.append(b"\x00" + b"\xff" * width)
+    pixels = b"".join(rows)
+    image = (b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+             b"/BitsPerComponent 8 /Filter /FlateDecode /DecodeParms << /Predictor 15 /Columns %d >> "
+             b"/Length %d >>\nstream\n" % (width, height, width, 0))
+    compressed = zlib.compress(pixels)
+    image = image.replace(b"/Length 0", b"/Length %d" % len(compressed)) + compressed + b"\nendstream"
+    streams = [b"q 612 0 0 792 0 0 cm /Im1 Do Q" for _ in range(pages)]
+    write_pdf(path, streams, "<< /XObject << /Im1 3 0 R >> >>", [image])
+
+def write_docx(path, pages, rng):
+    """DOCX with paragraphs interleaved with two-column skills tables"""
+    from docx import Document
+    document = Document()
+    for page in range(pages):
+        for line in resume_lines(rng, 40):
+            document.add_paragraph(line)
+        table = document.add_table(rows=6, cols=2)
+        for row in table.rows:
+            row.cells[0].text = rng.choice(SECTIONS)
+            row.cells[1].text = ", ".join(rng.choice(WORDS) for _ in range(6))
+    document.save(str(path))
+
+def write_plain_text(path, pages, rng):
+    pathlib.Path(path).write_text("\n".join(resume_lines(rng, 55 * pages)) + "\n", encoding="utf-8")
+
+def write_junk(path, pages, rng):
+    """Unknown binary with scattered ASCII runs, like a mislabeled upload"""
+    chunks = []
+    for _ in range(pages):
+        chunks.append(rng.randbytes(40000))
+        chunks.append(" ".join(resume_lines(rng, 10)).encode())
+    pathlib.Path(path).write_bytes(b"".join(chunks))
+
+# kind -> (file extension, writer)
+KINDS = {
+    "text_pdf": (".pdf", write_text_pdf),
+    "cid_pdf": (".pdf", write_cid_pdf),
+    "image_pdf": (".pdf", write_image_pdf),
+    "docx_tables": (".docx", write_docx),
+    "plain_text": (".txt", write_plain_text),
+    "junk_binary": (".bin", write_junk),
+}
+
+def build_corpus(directory, page_counts=(1, 5, 50), kinds=None, seed=1234):
+    """Generate every kind at every page count; returns [(kind, pages, path)]"""
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for kind in kinds or KINDS:
+        extension, writer = KINDS[kind]
+        for pages in page_counts:
+            path = directory / f"{kind}_{pages}p{extension}"
+            if not path.exists():
+                writer(path, pages, random.Random(f"{seed}-{kind}-{pages}"))
+            corpus.append((kind, pages, path))
+    return corpus
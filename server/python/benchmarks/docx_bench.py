@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# docx_bench.py - Compare the streaming DOCX reader with the python-docx object model
+#
+# Usage: python3 server/python/benchmarks/docx_bench.py [pages ...]
+
+import io
+import os
+import sys
+import time
+import zlib
+import struct
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import SECTIONS, WORDS, resume_lines
+from docx_text import extract_docx_text
+
+DEFAULT_PAGES = [5, 50, 200]
+
+def legacy_docx_text(file_path):
+    """The python-docx extraction previously copied into wrapper.py and resume_convert.py"""
+    from docx import Document
+    doc = Document(str(file_path))
+    full_text = []
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            full_text.append(paragraph.text.strip())
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip():
+                    full_text.append(cell.text.strip())
+    return '\n'.join(full_text)
+
+def noise_png(rng, width=600, height=400):
+    """An incompressible grayscale PNG, standing in for an embedded photo"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + rng.randbytes(width) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+def write_large_docx(path, pages, rng):
+    """Paragraphs, merged-cell tables and one embedded image per page"""
+    from docx import Document
+    from docx.shared import Inches
+    document = Document()
+    for _ in range(pages):
+        for line in resume_lines(rng, 40):
+            document.add_paragraph(line)
+        table = document.add_table(rows=4, cols=3)
+        table.cell(0, 0).merge(table.cell(0, 2)).text = rng.choice(SECTIONS)
+        for row in table.rows[1:]:
+            for cell in row.cells:
+                cell.text = " ".join(rng.choice(WORDS) for _ in range(4))
+        document.add_picture(io.BytesIO(noise_png(rng)), width=Inches(2))
+    document.save(str(path))
+
+def measure(function, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    text = function(path)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, seconds, peak / (1024 * 1024)
+
+def main():
+    pages_list = [int(arg) for arg in sys.argv[1:]] or DEFAULT_PAGES
+    print(f"{'pages':>6} {'size MB':>8} {'python-docx s':>14} {'stream s':>9} "
+          f"{'python-docx MB':>15} {'stream MB':>10} {'legacy chars':>13} {'stream chars':>13}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in pages_list:
+            path = os.path.join(workdir, f"resume_{pages}p.docx")
+            write_large_docx(path, pages, random.Random(pages))
+            legacy_text, legacy_seconds, legacy_peak = measure(legacy_docx_text, path)
+            stream_text, stream_seconds, stream_peak = measure(extract_docx_text, path)
+            # Streaming drops repeated merged cells, so it may be slightly shorter
+            print(f"{pages:>6} {os.path.getsize(path) / (1024 * 1024):>8.1f} {legacy_seconds:>14.3f} "
+                  f"{stream_seconds:>9.3f} {legacy_peak:>15.1f} {stream_peak:>10.1f} "
+                  f"{len(legacy_text):>13} {len(stream_text):>13}")
+
+if __name__ == "__main__":
+    main()
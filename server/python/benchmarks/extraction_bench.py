@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# extraction_bench.py - Throughput, latency and peak RSS of the extraction commands
+#
+# Usage:
+#   python3 server/python/benchmarks/extraction_bench.py [--pages 1,5,50] [--large]
+#       [--repeat 3] [--commands convert,extract_text,direct_extract_text]
+#       [--save-baseline baseline.json] [--compare baseline.json --threshold 0.25]
+#
+# Each (command, file) sample runs in a fresh child process so peak RSS is per call.
+# Results bypass the extraction cache. Exits with status 1 when --compare finds a
+# p50/p95 latency or peak RSS regression larger than --threshold.
+
+import os
+import sys
+import json
+import time
+import argparse
+import pathlib
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import KINDS, build_corpus
+
+COMMANDS = ("convert", "extract_text", "direct_extract_text")
+COMPARED_FIELDS = ("p50_ms", "p95_ms", "peak_rss_mb")
+
+def run_sample(command, path):
+    """Child-process entry point: time one command and report its peak RSS"""
+    import metrics
+    import wrapper
+
+    collector = metrics.begin()
+    engine = None
+    error = None
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            if command == "direct_extract_text":
+                wrapper.direct_extract_text(path)
+                engine = collector.engine
+            else:
+                # The same path the CLI and serve take, so convert and segment
+                # are measured as they are defined in cached_command
+                result = wrapper.run_command(command, path, use_cache=False)
+                engine = result["metrics"]["engine"]
+                error = result.get("error")
+        except Exception as e:
+            error = str(e)
+    seconds = time.perf_counter() - started
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {"seconds": seconds, "peak_rss_mb": peak_mb, "engine": engine, "error": error}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples):
+    """Group samples by command and file kind"""
+    groups = {}
+    for sample in samples:
+        groups.setdefault(f"{sample['command']}/{sample['kind']}", []).append(sample)
+
+    summary = {}
+    for name, group in sorted(groups.items()):
+        latencies = [sample["seconds"] for sample in group]
+        total_seconds = sum(latencies) or 1e-9
+        summary[name] = {
+            "samples": len(group),
+            "errors": sum(1 for sample in group if sample["error"]),
+            "files_per_s": round(len(group) / total_seconds, 2),
+            "mb_per_s": round(sum(sample["bytes"] for sample in group) / (1024 * 1024) / total_seconds, 3),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "peak_rss_mb": round(max(sample["peak_rss_mb"] for sample in group), 1),
+            "engines": sorted({sample["engine"] or "none" for sample in group}),
+        }
+    return summary
+
+def print_summary(summary):
+    print(f"{'command/kind':<36} {'n':>4} {'err':>4} {'files/s':>8} {'MB/s':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>7}  engines")
+    for name, row in summary.items():
+        print(f"{name:<36} {row['samples']:>4} {row['errors']:>4} {row['files_per_s']:>8} "
+              f"{row['mb_per_s']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['peak_rss_mb']:>7}  "
+              f"{','.join(row['engines'])}")
+
+def compare(summary, baseline, threshold):
+    """Return regressions where a metric grew by more than threshold (a fraction)"""
+    regressions = []
+    for name, row in summary.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for field in COMPARED_FIELDS:
+            before, after = previous.get(field), row.get(field)
+            if before and after and after > before * (1 + threshold):
+                regressions.append(f"{name} {field}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wrapper.py extraction over a synthetic corpus")
+    parser.add_argument("--pages", default="1,5,50", help="comma-separated page counts per document")
+    parser.add_argument("--large", action="store_true", help="also generate 500-page documents")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma-separated corpus kinds")
+    parser.add_argument("--commands", default=",".join(COMMANDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "resume-bench-corpus"))
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    page_counts = [int(pages) for pages in args.pages.split(",")] + ([500] if args.large else [])
+    corpus = build_corpus(args.corpus_dir, page_counts, args.kinds.split(","))
+    commands = args.commands.split(",")
+
+    # maxtasksperchild=1 gives every sample a fresh process and its own peak RSS
+    pool = multiprocessing.Pool(processes=1, maxtasksperchild=1)
+    samples = []
+    try:
+        for command in commands:
+            for kind, pages, path in corpus:
+                for _ in range(args.repeat):
+                    sample = pool.apply(run_sample, (command, str(path)))
+                    sample.update(command=command, kind=kind, pages=pages, bytes=path.stat().st_size)
+                    samples.append(sample)
+    finally:
+        pool.close()
+        pool.join()
+
+    summary = summarize(samples)
+    print_summary(summary)
+
+    if args.save_baseline:
+        pathlib.Path(args.save_baseline).write_text(json.dumps(summary, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text())
+        regressions = compare(summary, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# fallback_bench.py - Compare the chunked printable-text extractor with the old per-byte loops
+#
+# Usage: python3 server/python/benchmarks/fallback_bench.py [size_mb ...]
+
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from printable_text import extract_printable_text
+
+DEFAULT_SIZES_MB = [1, 10, 50]
+
+def legacy_direct_extract(file_path):
+    """The byte-at-a-time loop previously used by direct_extract_text"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    text = ""
+    for byte in data:
+        if (32 <= byte <= 126) or byte == 10 or byte == 9:
+            text += chr(byte)
+    text = re.sub(r'[^\x20-\x7E\n\t]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\(cid:\d+\)', '', text)
+    return text.strip()
+
+def write_sample(path, size):
+    """Write a scanned-PDF-like mix of binary noise, text runs and CID markers"""
+    rng = random.Random(size)
+    pieces = [b"(cid:12)", b"Experience ", b"\n", b"\t", b"  ", b"stream\n", b"Python AWS "]
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            block = rng.randbytes(4096) + b"".join(rng.choice(pieces) for _ in range(256))
+            f.write(block)
+            written += len(block)
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def main():
+    sizes = [float(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES_MB
+    print(f"{'size':>8} {'legacy s':>10} {'chunked s':>10} {'speedup':>8}  match")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in sizes:
+            path = os.path.join(workdir, f"sample_{size_mb}mb.bin")
+            write_sample(path, int(size_mb * 1024 * 1024))
+            expected, legacy_seconds = timed(legacy_direct_extract, path)
+            actual, chunked_seconds = timed(extract_printable_text, path, strip_cid=True)
+            print(f"{size_mb:>6g}MB {legacy_seconds:>10.3f} {chunked_seconds:>10.3f} "
+                  f"{legacy_seconds / max(chunked_seconds, 1e-9):>7.1f}x  {actual == expected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# office_pool_check.py - Exercise the warm LibreOffice pool against a stub listener
+#
+# Usage:
+#   python3 server/python/benchmarks/office_pool_check.py [--soffice]
+#
+# Runs office_pool.py against office_stub_listener.py (or the real listener with
+# --soffice) and checks that the pool starts lazily, survives a conversion error,
+# restarts a listener that crashes or stops answering mid-job and retries the job
+# once, and gives up on a job that hangs twice. Also checks that `wrapper.py serve`
+# starts no listener until a Word document is converted. Exits with status 1 on
+# any failure, so it can gate CI.
+
+import os
+import sys
+import json
+import time
+import shlex
+import pathlib
+import tempfile
+import argparse
+import subprocess
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+WRAPPER = BENCH_DIR.parent / "wrapper.py"
+STUB = BENCH_DIR / "office_stub_listener.py"
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import build_corpus
+
+# Deadline per job; the hang cases wait this long once or twice
+JOB_TIMEOUT = 2.0
+
+def children(pid):
+    """Direct child process ids of pid (Linux)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return f.read().split()
+    except OSError:
+        return []
+
+def check_pool(directory, failures):
+    import office_pool
+
+    def convert(name):
+        source = directory / name
+        source.write_bytes(b"stub document")
+        return office_pool.convert(source, directory, JOB_TIMEOUT)
+
+    def listener_pid():
+        return office_pool.pool.listeners[0].process.pid
+
+    def expect_error(name, label):
+        try:
+            convert(name)
+        except office_pool.ListenerError:
+            return True
+        failures.append(f"{label}: no ListenerError")
+        return False
+
+    office_pool.enable(timeout=JOB_TIMEOUT * 5)
+    if office_pool.pool is not None:
+        failures.append("lazy start: pool started before the first conversion")
+
+    pdf = convert("resume.docx")
+    if office_pool.pool is None or not pdf or not pathlib.Path(pdf).exists():
+        failures.append(f"conversion: no PDF produced ({pdf})")
+        return
+    pid = listener_pid()
+
+    if expect_error("bad.docx", "conversion error") and listener_pid() != pid:
+        failures.append("conversion error: the listener was restarted although it was healthy")
+
+    pdf = convert("crash-once.docx")
+    if not pdf or listener_pid() == pid:
+        failures.append("crash: the job was not retried on a restarted listener")
+    pid = listener_pid()
+
+    started = time.monotonic()
+    pdf = convert("hang-once.docx")
+    if not pdf or listener_pid() == pid:
+        failures.append("timeout: the job was not retried on a restarted listener")
+    elif time.monotonic() - started > JOB_TIMEOUT * 3:
+        failures.append("timeout: the hung listener was not killed at the deadline")
+
+    expect_error("hang.docx", "repeated timeout")
+    if not convert("after.docx"):
+        failures.append("recovery: no conversion after a repeated timeout")
+    office_pool.pool.close()
+
+def check_serve(directory, failures):
+    """A serve worker only starts its listener for a Word conversion"""
+    docx = next(path for kind, _, path in build_corpus(directory / "corpus", page_counts=(1,),
+                                                       kinds=("docx_tables",)))
+    env = {**os.environ, "RESUME_CACHE_DIR": str(directory / "cache"), "RESUME_SCHEDULER": "0"}
+    proc = subprocess.Popen([sys.executable, str(WRAPPER), "serve"], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+    try:
+        json.loads(proc.stdout.readline())
+
+        def job(payload):
+            proc.stdin.write(json.dumps(payload) + "\n")
+            proc.stdin.flush()
+            return json.loads(proc.stdout.readline())
+
+        job({"id": 1, "command": "extract_text", "path": str(docx)})
+        if children(proc.pid):
+            failures.append("serve: a listener was started for a text extraction")
+        result = job({"id": 2, "command": "convert", "path": str(docx), "pdf": True})
+        if not result.get("pdf_path"):
+            failures.append(f"serve: convert --pdf failed: {result.get('pdf_error') or result.get('error')}")
+        if not children(proc.pid):
+            failures.append("serve: no listener running after a Word conversion")
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the LibreOffice listener pool's restart handling")
+    parser.add_argument("--soffice", action="store_true",
+                        help="use the real listener instead of the stub (serve check only)")
+    args = parser.parse_args()
+    if not args.soffice:
+        os.environ["RESUME_OFFICE_LISTENER"] = shlex.join([sys.executable, str(STUB)])
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = pathlib.Path(directory)
+        if not args.soffice:
+            check_pool(directory, failures)
+        check_serve(directory, failures)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("Office pool checks passed")
+
+if __name__ == "__main__":
+    main()
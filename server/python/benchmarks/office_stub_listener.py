@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# office_stub_listener.py - Stand-in for office_listener.py where LibreOffice isn't installed
+#
+# Usage: RESUME_OFFICE_LISTENER="python3 office_stub_listener.py" wrapper.py serve
+#
+# Speaks office_listener.py's NDJSON protocol and "converts" by writing a one-page
+# PDF that names the source. Source file names steer failures for office_pool_check.py:
+#   crash-once*  exits mid-job the first time it is seen (a marker file records it)
+#   hang-once*   stops answering the first time it is seen
+#   hang*        never answers
+#   bad*         replies with a conversion error and keeps serving
+
+import os
+import sys
+import json
+import time
+import pathlib
+
+MINIMAL_PDF = (b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+               b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+               b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+               b"trailer<</Root 1 0 R>>\n%%EOF\n")
+
+def first_time(source):
+    """True the first time source is seen by any stub process"""
+    marker = pathlib.Path(f"{source}.seen")
+    if marker.exists():
+        return False
+    marker.touch()
+    return True
+
+def main():
+    def emit(payload):
+        sys.stdout.write(json.dumps(payload) + "\n")
+        sys.stdout.flush()
+
+    emit({"ready": True, "pid": os.getpid()})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if job.get("ping"):
+            emit({"id": job.get("id"), "pong": True})
+            continue
+
+        source = pathlib.Path(job["source"])
+        name = source.name
+        if name.startswith("crash-once") and first_time(source):
+            os._exit(1)
+        if (name.startswith("hang-once") and first_time(source)) or \
+                (name.startswith("hang") and not name.startswith("hang-once")):
+            time.sleep(3600)
+        if name.startswith("bad"):
+            emit({"id": job.get("id"), "error": f"could not open {name}"})
+            continue
+
+        target = pathlib.Path(job["outdir"]) / (source.stem + ".pdf")
+        target.write_bytes(MINIMAL_PDF)
+        emit({"id": job.get("id"), "pdf": str(target)})
+
+if __name__ == "__main__":
+    main()
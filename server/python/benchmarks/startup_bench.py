@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# startup_bench.py - Cold-start import time of wrapper.py for text and DOCX uploads
+#
+# Usage:
+#   python3 server/python/benchmarks/startup_bench.py [--repeat 5] [--budget-ms 80]
+#       [--wall-budget-ms 0] [--json]
+#
+# Each case runs `python -X importtime wrapper.py ...` in a fresh process and sums
+# the top-level import times it reports; the median over --repeat runs is checked
+# against the budget. Text and DOCX extraction (and a bare usage error) must also
+# never load the PDF, OCR or libmagic stacks. Exits with status 1 when a case is
+# over budget or imports a forbidden module, so it can gate CI.
+
+import os
+import sys
+import json
+import time
+import argparse
+import pathlib
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = pathlib.Path(__file__).resolve().parent
+WRAPPER = BENCH_DIR.parent / "wrapper.py"
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import build_corpus
+
+# Loaded only by the branches that need them; a text or DOCX job importing one is a regression
+FORBIDDEN = ("pdfplumber", "pdfminer", "PIL", "magic", "pytesseract", "pdf2image",
+             "multiprocessing", "concurrent.futures.process", "cProfile", "tracemalloc")
+
+def parse_importtime(stderr):
+    """Return (total top-level import microseconds, set of imported module names)"""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; top-level ones already include them
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+        modules.add(name.strip())
+    return total, modules
+
+def run_case(args, cache_dir):
+    env = {**os.environ, "RESUME_CACHE_DIR": cache_dir, "RESUME_PROFILE": ""}
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(WRAPPER), *args],
+                          capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - started
+    import_us, modules = parse_importtime(proc.stderr)
+    return import_us / 1000, wall * 1000, modules, proc.stdout
+
+def main():
+    parser = argparse.ArgumentParser(description="Check wrapper.py cold-start import time for text and DOCX inputs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("RESUME_STARTUP_BUDGET_MS", "80")),
+                        help="median import time allowed per case")
+    parser.add_argument("--wall-budget-ms", type=float, default=0,
+                        help="median wall time allowed per case, including the extraction (0 = unchecked)")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "resume-bench-corpus"))
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    corpus = {kind: path for kind, _, path in
+              build_corpus(args.corpus_dir, page_counts=(1,), kinds=("plain_text", "docx_tables"))}
+    cases = {
+        "text": ["--no-cache", "extract_text", str(corpus["plain_text"])],
+        "docx": ["--no-cache", "extract_text", str(corpus["docx_tables"])],
+        "usage": [],
+    }
+
+    report = {}
+    failures = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, case_args in cases.items():
+            samples = [run_case(case_args, cache_dir) for _ in range(args.repeat)]
+            import_ms = statistics.median(sample[0] for sample in samples)
+            wall_ms = statistics.median(sample[1] for sample in samples)
+            loaded = sorted(module for module in set.union(*(sample[2] for sample in samples))
+                            if module in FORBIDDEN or module.split(".")[0] in FORBIDDEN)
+            if name != "usage" and '"success": true' not in samples[0][3]:
+                failures.append(f"{name}: extraction failed: {samples[0][3].strip()[:200]}")
+            if import_ms > args.budget_ms:
+                failures.append(f"{name}: import time {import_ms:.1f} ms over the {args.budget_ms:g} ms budget")
+            if args.wall_budget_ms and wall_ms > args.wall_budget_ms:
+                failures.append(f"{name}: wall time {wall_ms:.1f} ms over the {args.wall_budget_ms:g} ms budget")
+            if loaded:
+                failures.append(f"{name}: imported {', '.join(loaded)}")
+            report[name] = {"import_ms": round(import_ms, 1), "wall_ms": round(wall_ms, 1), "forbidden": loaded}
+
+    if args.json:
+        print(json.dumps({"cases": report, "budget_ms": args.budget_ms, "failures": failures}, indent=2))
+    else:
+        print(f"{'case':<8} {'import ms':>10} {'wall ms':>10}")
+        for name, row in report.items():
+            print(f"{name:<8} {row['import_ms']:>10} {row['wall_ms']:>10}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if not failures:
+            print(f"\nAll cases within the {args.budget_ms:g} ms import budget")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
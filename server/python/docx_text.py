@@ -0,0 +1,253 @@
+# docx_text.py - Stream text out of word/document.xml without building the python-docx model
+
+import io
+import re
+import difflib
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Legacy VML copies of text boxes live under mc:Fallback and would duplicate the mc:Choice text
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+RUN_CHARACTERS = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "br": "\n",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+
+def is_merged_continuation(cell):
+    """True for a vertically merged cell that continues the one above it"""
+    merge = cell.find(f"{W}tcPr/{W}vMerge")
+    return merge is not None and merge.get(W + "val", "continue") == "continue"
+
+def iter_docx_blocks(file_path):
+    """Yield ("paragraph" | "cell", text) in document order.
+
+    Paragraph text follows python-docx's Paragraph.text (runs, tabs, breaks);
+    a table cell yields its paragraphs joined by newlines, like _Cell.text.
+    Horizontally merged cells appear once and vertical merge continuations are
+    skipped, so merged content is never repeated.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        yield from iter_xml_blocks(xml)
+
+def iter_xml_blocks(xml):
+    """iter_docx_blocks for one WordprocessingML stream (document, header or footer part)"""
+    paragraphs = []   # open paragraphs (text boxes nest them), each a list of run text
+    cells = []        # open table cells, each a list of paragraph text
+    run_depth = 0
+    skip_depth = 0
+
+    for event, element in ET.iterparse(xml, events=("start", "end")):
+        tag = element.tag
+
+        if tag == MC_FALLBACK:
+            skip_depth += 1 if event == "start" else -1
+            if event == "end":
+                element.clear()
+            continue
+        if skip_depth:
+            continue
+
+        if event == "start":
+            if tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            elif tag == W + "r":
+                run_depth += 1
+            continue
+
+        if tag == W + "r":
+            run_depth -= 1
+        elif tag == W + "t":
+            if paragraphs:
+                paragraphs[-1].append(element.text or "")
+        elif tag in RUN_CHARACTERS:
+            # w:tab also defines tab stops in paragraph properties; only runs count
+            if run_depth and paragraphs:
+                paragraphs[-1].append(RUN_CHARACTERS[tag])
+        elif tag == W + "p":
+            text = "".join(paragraphs.pop())
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield "paragraph", text
+            element.clear()
+        elif tag == W + "tc":
+            texts = cells.pop()
+            if not is_merged_continuation(element):
+                yield "cell", "\n".join(texts)
+            element.clear()
+
+def extract_docx_text(file_path):
+    """Return the non-empty paragraphs and table cells, stripped and newline-joined"""
+    blocks = (text.strip() for _, text in iter_docx_blocks(file_path))
+    return "\n".join(text for text in blocks if text)
+
+# Bump whenever the manifest layout or part text changes; older manifests are then ignored
+PARTS_VERSION = 1
+
+# Top-level body elements, found without parsing: paragraphs, tables and content controls.
+# Nested ones (cell and text box paragraphs) only move the depth. A top-level
+# mc:Fallback is a legacy duplicate of the content before it and is dropped.
+PART_TAG_RE = re.compile(rb"<(/?)(w:p|w:tbl|w:sdt|mc:Fallback)(?=[\s/>])[^>]*?(/?)>")
+PART_KINDS = {b"w:p": "paragraph", b"w:tbl": "table", b"w:sdt": "content control"}
+
+HEADER_PART_RE = re.compile(r"word/(?:header|footer)\d*\.xml")
+
+def split_body(xml):
+    """Split document.xml into (root start tag, [(kind, raw bytes)] of top-level body elements).
+
+    Returns None when the body can't be found by its w: prefix, so callers
+    parse the whole document instead.
+    """
+    root = xml.find(b"<w:document")
+    body = xml.find(b"<w:body", root)
+    end = xml.rfind(b"</w:body>")
+    if root == -1 or body == -1 or end == -1:
+        return None
+    root_tag = xml[root:xml.index(b">", root) + 1]
+
+    parts = []
+    depth = 0
+    start = None
+    for match in PART_TAG_RE.finditer(xml, xml.index(b">", body) + 1, end):
+        closing, tag, self_closing = match.groups()
+        if closing:
+            depth -= 1
+            if depth == 0 and tag != b"mc:Fallback":
+                parts.append((PART_KINDS[tag], xml[start:match.end()]))
+        elif self_closing:
+            if depth == 0 and tag != b"mc:Fallback":
+                parts.append((PART_KINDS[tag], match.group(0)))
+        else:
+            if depth == 0:
+                start = match.start()
+            depth += 1
+    return root_tag, parts
+
+def part_texts(root_tag, part):
+    """Stripped, non-empty block texts of one top-level body element"""
+    xml = root_tag + b"<w:body>" + part + b"</w:body></w:document>"
+    blocks = (text.strip() for _, text in iter_xml_blocks(io.BytesIO(xml)))
+    return [text for text in blocks if text]
+
+def part_hash(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def extract_docx_incremental(file_path, previous=None):
+    """Extract text like extract_docx_text, re-parsing only parts changed since previous.
+
+    previous is the manifest returned for the last extracted version of the
+    same document (same PARTS_VERSION). Top-level paragraphs, tables and content controls, and
+    each header and footer part, are hashed from their raw XML; a part whose
+    hash appears in previous keeps its stored text and is not parsed again.
+    Returns (text, manifest, reparsed part count). Header and footer text is
+    only tracked for the diff; like extract_docx_text, the text leaves it out.
+    """
+    known = {part["hash"]: part["texts"] for part in (previous or {}).get("parts", [])}
+    known_headers = {header["hash"]: header["text"] for header in (previous or {}).get("headers", {}).values()}
+    reparsed = 0
+
+    with zipfile.ZipFile(file_path) as archive:
+        xml = archive.read("word/document.xml")
+        header_names = sorted(name for name in archive.namelist() if HEADER_PART_RE.fullmatch(name))
+        header_data = {name: archive.read(name) for name in header_names}
+
+    parts = []
+    split = split_body(xml)
+    if split is None:
+        blocks = (block.strip() for _, block in iter_xml_blocks(io.BytesIO(xml)))
+        parts.append({"hash": part_hash(xml), "kind": "document", "texts": [block for block in blocks if block]})
+        reparsed += 1
+    else:
+        root_tag, raw_parts = split
+        for kind, data in raw_parts:
+            digest = part_hash(data)
+            texts = known.get(digest)
+            if texts is None:
+                texts = known[digest] = part_texts(root_tag, data)
+                reparsed += 1
+            parts.append({"hash": digest, "kind": kind, "texts": texts})
+
+    headers = {}
+    for name, data in header_data.items():
+        digest = part_hash(data)
+        text = known_headers.get(digest)
+        if text is None:
+            blocks = (block.strip() for _, block in iter_xml_blocks(io.BytesIO(data)))
+            text = "\n".join(block for block in blocks if block)
+            reparsed += 1
+        headers[name] = {"hash": digest, "text": text}
+
+    text = "\n".join(block for part in parts for block in part["texts"])
+    manifest = {"version": PARTS_VERSION, "parts": parts, "headers": headers}
+    return text, manifest, reparsed
+
+def part_offsets(parts):
+    """(start, end) of each part's text within the joined document text"""
+    offsets = []
+    position = 0
+    seen_text = False
+    for part in parts:
+        if part["texts"] and seen_text:
+            position += 1  # the newline joining it to the text before
+        length = len("\n".join(part["texts"]))
+        offsets.append((position, position + length))
+        position += length
+        seen_text = seen_text or bool(part["texts"])
+    return offsets
+
+def diff_parts(previous, manifest):
+    """Body and header changes between two manifests.
+
+    Returns [{"op": "changed" | "added" | "removed", "kind", "before", "after",
+    "start", "end"}] where start and end are offsets into the new text (equal
+    for a removal, at the point where the removed part was). Header and
+    footer changes carry "part" (e.g. word/header1.xml) instead of offsets.
+    """
+    before, after = previous["parts"], manifest["parts"]
+    offsets = part_offsets(after)
+    matcher = difflib.SequenceMatcher(None, [part["hash"] for part in before],
+                                      [part["hash"] for part in after], autojunk=False)
+    changes = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        old = "\n".join(block for part in before[i1:i2] for block in part["texts"])
+        new = "\n".join(block for part in after[j1:j2] for block in part["texts"])
+        if old == new:
+            # Formatting-only edit: the XML changed but the text did not
+            continue
+        if j1 < j2:
+            start, end = offsets[j1][0], offsets[j2 - 1][1]
+        else:
+            start = end = offsets[j1][0] if j1 < len(offsets) else (offsets[-1][1] if offsets else 0)
+        kinds = {part["kind"] for part in before[i1:i2] + after[j1:j2]}
+        changes.append({
+            "op": {"replace": "changed", "insert": "added", "delete": "removed"}[op],
+            "kind": kinds.pop() if len(kinds) == 1 else "mixed",
+            "before": old or None,
+            "after": new or None,
+            "start": start,
+            "end": end,
+        })
+
+    old_headers = previous.get("headers", {})
+    for name in sorted(set(old_headers) | set(manifest["headers"])):
+        old = old_headers.get(name, {}).get("text")
+        new = manifest["headers"].get(name, {}).get("text")
+        if old != new:
+            changes.append({
+                "op": "changed" if old is not None and new is not None else ("added" if old is None else "removed"),
+                "kind": "footer" if "footer" in name else "header",
+                "part": name,
+                "before": old,
+                "after": new,
+            })
+    return changes
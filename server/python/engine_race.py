@@ -0,0 +1,142 @@
+# engine_race.py - Run the cheap PDF text engines concurrently and keep the first good result
+
+import os
+import time
+import queue
+import threading
+import subprocess
+
+from ocr import page_needs_ocr
+from resume_convert import ENGINE_TIMEOUT, usable_text, run_pages, pdfplumber_page_range
+
+RACE_ENGINES = ("pdftotext", "pdfplumber")
+
+def pdfplumber_worker(file_path, conn):
+    """Child-process entry point: send pdfplumber's page texts (or an error) back over conn"""
+    import pdfplumber
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+        pages = run_pages(pdfplumber_page_range, file_path, page_count, 1, "pdfplumber")
+        conn.send(([page_text for _, page_text, _ in pages], None))
+    except Exception as e:
+        conn.send((None, str(e)))
+    finally:
+        conn.close()
+
+def start_pdftotext(file_path, results):
+    """Start pdftotext; returns a function that kills it"""
+    proc = subprocess.Popen(["pdftotext", file_path, "-"],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def wait():
+        output, errors = proc.communicate()
+        if proc.returncode == 0:
+            # pdftotext ends every page with a form feed
+            pages = output.split("\f")
+            if pages and not pages[-1].strip():
+                pages.pop()
+            results.put(("pdftotext", output, pages, None))
+        else:
+            results.put(("pdftotext", None, None, errors.strip() or f"exit code {proc.returncode}"))
+
+    threading.Thread(target=wait, daemon=True).start()
+    return proc.kill
+
+def start_pdfplumber(file_path, results):
+    """Start pdfplumber in a child process so it can be killed mid-parse"""
+    import multiprocessing
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=pdfplumber_worker, args=(file_path, sender), daemon=True)
+    proc.start()
+    sender.close()
+
+    def wait():
+        try:
+            pages, error = receiver.recv()
+        except EOFError:
+            pages, error = None, "process exited without a result"
+        text = "".join(page_text + "\n\n" for page_text in pages) if pages is not None else None
+        results.put(("pdfplumber", text, pages, error))
+        proc.join()
+
+    threading.Thread(target=wait, daemon=True).start()
+    return proc.kill
+
+STARTERS = {
+    "pdftotext": start_pdftotext,
+    "pdfplumber": start_pdfplumber,
+}
+
+def race_extract(file_path, engines=RACE_ENGINES, timeout=None):
+    """Start engines together and return (text, report) for the first usable result.
+
+    Engines that lose the race or miss the deadline are killed. text is None
+    when no engine produced usable text; report maps each engine to its
+    status ("won", "lost", "rejected", "needs_ocr", "stopped", "failed",
+    "timeout") and run time. Text with any page that needs OCR never wins:
+    extract_text has to rerun pdfplumber and OCR just those pages (see
+    needs_ocr()).
+    """
+    timeout = ENGINE_TIMEOUT if timeout is None else timeout
+    file_path = str(file_path)
+    results = queue.Queue()
+    killers = {}
+    started = {}
+    report = {}
+
+    for name in engines:
+        started[name] = time.perf_counter()
+        try:
+            killers[name] = STARTERS[name](file_path, results)
+        except (OSError, ValueError) as e:
+            report[name] = {"status": "failed", "seconds": 0.0, "error": str(e)}
+
+    winner = None
+    text = None
+    scanned = False
+    deadline = time.monotonic() + timeout
+    while len(report) < len(engines) and winner is None and not scanned:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            name, output, pages, error = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+
+        entry = {"seconds": round(time.perf_counter() - started[name], 4)}
+        if error is not None:
+            entry.update(status="failed", error=error)
+        # A scanned page has no text layer for either engine to find, so
+        # there is nothing left to race for
+        elif any(page_needs_ocr(page_text) for page_text in pages):
+            entry["status"] = "needs_ocr"
+            scanned = True
+        # The same check extract_text applies to these engines: the race
+        # skips them afterwards, so anything it rejects is lost for good
+        elif usable_text(output):
+            entry["status"] = "won"
+            winner, text = name, output.strip()
+        else:
+            entry["status"] = "rejected"
+        report[name] = entry
+
+    # Stop every engine that is still running: it lost, is no longer needed
+    # or ran out of time
+    for name in engines:
+        if name not in report:
+            killers[name]()
+            report[name] = {
+                "status": "lost" if winner else "stopped" if scanned else "timeout",
+                "seconds": round(time.perf_counter() - started[name], 4),
+            }
+
+    return text, {"winner": winner, "engines": report}
+
+def needs_ocr(report):
+    """True when an engine found pages without a usable text layer"""
+    return any(entry["status"] == "needs_ocr" for entry in report["engines"].values())
+
+def race_enabled():
+    return os.environ.get("RESUME_RACE_ENGINES", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,134 @@
+# extraction_cache.py - On-disk cache of extraction results keyed by file content
+
+import os
+import sys
+import json
+import hashlib
+import shutil
+import tempfile
+import pathlib
+
+# Bump whenever extraction output changes so stale entries are never served
+EXTRACTOR_VERSION = "3"
+
+DEFAULT_CACHE_DIR = pathlib.Path(tempfile.gettempdir()) / "resume-extraction-cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bytes_digest(data):
+    """Return the SHA-256 hex digest of in-memory document bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+class ExtractionCache:
+    """Content-addressed store of command results with a size cap and LRU eviction.
+
+    Entries are JSON files named after the file hash, command and extractor
+    version. Reads touch the entry's mtime, so eviction removes the least
+    recently used entries first once the directory grows past max_bytes.
+    Artifacts (converted files) share the directory, key scheme and size cap.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = pathlib.Path(cache_dir or os.environ.get("RESUME_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_bytes or os.environ.get("RESUME_CACHE_MAX_BYTES") or DEFAULT_MAX_BYTES)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, digest, command):
+        return f"{digest}-{command}-v{EXTRACTOR_VERSION}"
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached result for key, or None on a miss"""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Store a result atomically, then evict old entries if over the cap"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._entry_path(key))
+            self.evict()
+        except OSError as e:
+            # Caching is best effort; a read-only or full disk must not fail the upload
+            print(f"Could not write extraction cache entry: {e}", file=sys.stderr)
+
+    def get_artifact(self, key):
+        """Return the path of the file stored under key, or None"""
+        for entry in self.cache_dir.glob(f"{key}.*"):
+            if entry.suffix in (".json", ".tmp"):
+                continue
+            try:
+                os.utime(entry)
+            except OSError:
+                continue
+            return entry
+        return None
+
+    def put_artifact(self, key, source):
+        """Copy a file into the cache under key (keeping its suffix) and return the cached path.
+
+        Returns None when the cache can't be written, so callers keep using source.
+        """
+        source = pathlib.Path(source)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as dst, open(source, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            target = self.cache_dir / f"{key}{source.suffix}"
+            os.replace(tmp_path, target)
+            self.evict()
+            # A file larger than the whole cache is evicted straight away
+            return target if target.exists() else None
+        except OSError as e:
+            print(f"Could not write extraction cache artifact: {e}", file=sys.stderr)
+            return None
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in self.cache_dir.iterdir():
+            # In-progress writes belong to another process
+            if entry.suffix == ".tmp":
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self, status):
+        return {"status": status, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,398 @@
+# keyword_match.py - TF-IDF keyword index for pre-screening resumes against job descriptions
+
+import os
+import re
+import json
+import math
+import time
+import heapq
+import fcntl
+import pathlib
+import tempfile
+import contextlib
+
+# Snapshot of the whole index; changes since it was written are appended to a
+# log next to it (.log) and folded in once the log grows past COMPACT_RATIO of it
+INDEX_PATH = pathlib.Path(os.environ.get("RESUME_MATCH_INDEX") or
+                          pathlib.Path(tempfile.gettempdir()) / "resume-match-index.json")
+
+COMPACT_RATIO = 0.25
+COMPACT_MIN_BYTES = 1024 * 1024
+
+KINDS = ("job", "resume")
+
+# Keeps c++, c#, node.js, ci/cd and t-sql whole; trailing punctuation is dropped
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no nor not
+now of off on once only or other our ours out over own per same she should so some such than that the
+their theirs them then there these they this those through to too under until up very via was we were
+what when where which while who whom why will with within without would you your yours
+ability able across candidate candidates including strong excellent good great new work working worked
+years year experience experienced responsibilities responsible role team teams using use used well
+plus preferred required requirements skills skill knowledge understanding job position company
+""".split())
+
+# Single-letter tokens that are real skills
+SINGLE_LETTER_TERMS = ("c", "r")
+
+# Keyword lists returned per match
+KEYWORD_LIMIT = 15
+
+# Document norms are rebuilt once the collection has changed size by this fraction
+NORM_DRIFT = 0.1
+
+def terms(text):
+    """Term counts for text: unigrams plus bigrams of adjacent non-stopword tokens"""
+    tokens = [token for token in TOKEN_RE.findall((text or "").lower())
+              if (len(token) > 1 and token not in STOPWORDS and not token.isdigit())
+              or token in SINGLE_LETTER_TERMS]
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    for first, second in zip(tokens, tokens[1:]):
+        bigram = f"{first} {second}"
+        counts[bigram] = counts.get(bigram, 0) + 1
+    return counts
+
+class KeywordIndex:
+    """Inverted index of job and resume term counts with smoothed TF-IDF cosine scoring.
+
+    postings[kind][term] maps document ids to sublinear term frequencies, so
+    scoring a query touches only the postings of the query's own terms: a
+    sparse vector times the sparse term-document matrix, in one pass.
+    Adding or removing a document updates postings and document frequencies
+    in place; norms, which depend on every idf, are rebuilt only when the
+    collection size has drifted by NORM_DRIFT since the last rebuild.
+    While journal is a list, every add and remove is also recorded in it as
+    a log entry (see updating_index).
+    """
+
+    def __init__(self):
+        self.docs = {kind: {} for kind in KINDS}
+        self.postings = {kind: {} for kind in KINDS}
+        self.df = {}
+        self.norms = {kind: {} for kind in KINDS}
+        self.normalized_at = 0
+        self.journal = None
+
+    def __len__(self):
+        return sum(len(docs) for docs in self.docs.values())
+
+    def idf(self, term):
+        return math.log((1 + len(self)) / (1 + self.df.get(term, 0))) + 1
+
+    def vector(self, counts):
+        return {term: (1 + math.log(count)) * self.idf(term) for term, count in counts.items()}
+
+    def norm(self, counts):
+        return math.sqrt(sum(weight * weight for weight in self.vector(counts).values())) or 1.0
+
+    def add(self, kind, doc_id, text=None, counts=None, update_norm=True):
+        """Index (or re-index) one document"""
+        self.discard(kind, doc_id)
+        counts = terms(text) if counts is None else counts
+        self.docs[kind][doc_id] = counts
+        postings = self.postings[kind]
+        for term, count in counts.items():
+            postings.setdefault(term, {})[doc_id] = 1 + math.log(count)
+            self.df[term] = self.df.get(term, 0) + 1
+        if update_norm:
+            self.norms[kind][doc_id] = self.norm(counts)
+        if self.journal is not None:
+            self.journal.append({"op": "add", "kind": kind, "doc_id": doc_id, "counts": counts})
+
+    def remove(self, kind, doc_id):
+        if self.journal is not None:
+            self.journal.append({"op": "remove", "kind": kind, "doc_id": doc_id})
+        return self.discard(kind, doc_id)
+
+    def discard(self, kind, doc_id):
+        counts = self.docs[kind].pop(doc_id, None)
+        if counts is None:
+            return False
+        postings = self.postings[kind]
+        for term in counts:
+            docs = postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del postings[term]
+            self.df[term] -= 1
+            if not self.df[term]:
+                del self.df[term]
+        self.norms[kind].pop(doc_id, None)
+        return True
+
+    def refresh_norms(self):
+        size = len(self)
+        if size and abs(size - self.normalized_at) > NORM_DRIFT * max(self.normalized_at, 1):
+            # Term at a time over the postings, which already hold the log-scaled frequencies;
+            # idf is inlined because this runs once per distinct term
+            df = self.df
+            for kind in KINDS:
+                squares = dict.fromkeys(self.docs[kind], 0.0)
+                for term, docs in self.postings[kind].items():
+                    idf_squared = (math.log((1 + size) / (1 + df[term])) + 1) ** 2
+                    for doc_id, frequency in docs.items():
+                        squares[doc_id] += frequency * frequency * idf_squared
+                self.norms[kind] = {doc_id: math.sqrt(total) or 1.0 for doc_id, total in squares.items()}
+            self.normalized_at = size
+
+    def match(self, counts, kind, top=10, exclude=None, query_kind=None):
+        """Rank documents of kind against a query's term counts.
+
+        Returns [{"id", "score", "matched", "missing"}], best first. Keyword
+        lists are from the job's side: its highest-weighted terms that the
+        resume has (matched) or lacks (missing).
+        """
+        self.refresh_norms()
+        query = self.vector(counts)
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values())) or 1.0
+        postings = self.postings[kind]
+
+        scores = {}
+        for term, query_weight in query.items():
+            docs = postings.get(term)
+            if not docs:
+                continue
+            weight = query_weight * self.idf(term)
+            for doc_id, frequency in docs.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * frequency
+
+        norms = self.norms[kind]
+        ranked = heapq.nlargest(top, ((score / (query_norm * norms[doc_id]), doc_id)
+                                      for doc_id, score in scores.items() if doc_id != exclude))
+        query_is_job = (query_kind or ("resume" if kind == "job" else "job")) == "job"
+        matches = []
+        for score, doc_id in ranked:
+            document = self.docs[kind][doc_id]
+            job, resume = (counts, document) if query_is_job else (document, counts)
+            matched, missing = self.keywords(job, resume)
+            matches.append({"id": doc_id, "score": round(score, 4), "matched": matched, "missing": missing})
+        return matches
+
+    def keywords(self, job, resume, limit=KEYWORD_LIMIT):
+        """The job's top terms split into those the resume has and those it is missing.
+
+        Bigrams only count as keywords when the job repeats them (e.g. "machine
+        learning"); one-off word pairs are rare enough to outrank every skill.
+        """
+        candidates = {term: count for term, count in job.items() if " " not in term or count > 1}
+        ranked = sorted(self.vector(candidates).items(), key=lambda item: -item[1])
+        matched = [term for term, _ in ranked if term in resume][:limit]
+        missing = [term for term, _ in ranked if term not in resume][:limit]
+        return matched, missing
+
+    def to_dict(self):
+        return {"version": 1, "docs": self.docs, "norms": self.norms, "normalized_at": self.normalized_at}
+
+    def apply(self, entry):
+        """Replay one log entry; replaying an entry twice leaves the same index"""
+        if entry["op"] == "add":
+            self.add(entry["kind"], entry["doc_id"], counts=entry["counts"])
+        else:
+            self.discard(entry["kind"], entry["doc_id"])
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild postings from saved term counts in one pass; saved norms are reused so loading skips a rebuild"""
+        index = cls()
+        df = index.df
+        for kind in KINDS:
+            docs = index.docs[kind] = data.get("docs", {}).get(kind, {})
+            postings = index.postings[kind]
+            for doc_id, counts in docs.items():
+                for term, count in counts.items():
+                    docs_with_term = postings.get(term)
+                    if docs_with_term is None:
+                        docs_with_term = postings[term] = {}
+                    docs_with_term[doc_id] = 1 + math.log(count)
+                    df[term] = df.get(term, 0) + 1
+        # Norms need every document frequency, so they come after both kinds
+        norms = data.get("norms") or {}
+        for kind in KINDS:
+            saved = norms.get(kind, {})
+            index.norms[kind] = {doc_id: saved[doc_id] if doc_id in saved else index.norm(counts)
+                                 for doc_id, counts in index.docs[kind].items()}
+        index.normalized_at = data.get("normalized_at", 0)
+        index.refresh_norms()
+        return index
+
+# Index loaded by this process: (snapshot mtime, log bytes already applied, index)
+_loaded = (None, 0, None)
+
+def log_path(path):
+    return path.with_suffix(".log")
+
+@contextlib.contextmanager
+def index_lock(path, exclusive=False):
+    """Shared lock for reading the snapshot and log, exclusive for changing them"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+def read_log(path, offset):
+    """Log entries appended since offset, and the offset after them"""
+    try:
+        with open(log_path(path), 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    # A line cut short by a crashed writer is dropped by the next writer
+    end = data.rfind(b"\n") + 1
+    return [json.loads(line) for line in data[:end].splitlines() if line.strip()], offset + end
+
+def load_index(path=None):
+    """Return the index on disk (snapshot plus logged changes); call with the index lock held.
+    
+    The copy in memory is reused while the snapshot is unchanged, and only
+    the log entries appended since it was last read are applied to it.
+    """
+    global _loaded
+    path = pathlib.Path(path or INDEX_PATH)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    loaded_mtime, offset, index = _loaded
+    try:
+        log_size = os.path.getsize(log_path(path))
+    except OSError:
+        log_size = 0
+    # A compaction replaced the snapshot and emptied the log: start over
+    if index is None or loaded_mtime != mtime or log_size < offset:
+        index = KeywordIndex()
+        if mtime is not None:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = KeywordIndex.from_dict(json.load(f))
+        offset = 0
+    entries, offset = read_log(path, offset)
+    for entry in entries:
+        index.apply(entry)
+    _loaded = (mtime, offset, index)
+    return index
+
+def current_index(path=None):
+    """The index as of now, for matching"""
+    path = pathlib.Path(path or INDEX_PATH)
+    with index_lock(path):
+        return load_index(path)
+
+def append_log(path, entries):
+    """Append entries to the log, first cutting off a line a crashed writer left unfinished"""
+    with open(log_path(path), 'ab+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(max(0, size - 1))
+            if f.read(1) != b"\n":
+                f.seek(0)
+                f.truncate(f.read().rfind(b"\n") + 1)
+        f.write(b"".join(json.dumps(entry).encode() + b"\n" for entry in entries))
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+def compact(path, index):
+    """Write the whole index as a new snapshot and empty the log; call with the exclusive lock held.
+    
+    A reader that loads the new snapshot before the log is emptied replays
+    the old log over it, which ends in the same state.
+    """
+    global _loaded
+    # Saved with fresh norms, so loading the snapshot doesn't rebuild them
+    index.refresh_norms()
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(index.to_dict(), f)
+    os.replace(tmp_path, path)
+    with open(log_path(path), 'wb'):
+        pass
+    _loaded = (path.stat().st_mtime_ns, 0, index)
+
+@contextlib.contextmanager
+def updating_index(path=None):
+    """Load the index under an exclusive lock and log the changes made in the block.
+    
+    Serve workers share one index; the lock keeps their updates from
+    overwriting each other. A change costs one appended log line instead of
+    a rewrite of the whole index, and other processes apply just the new
+    lines. The log is folded into a new snapshot once it outgrows
+    COMPACT_RATIO of the snapshot.
+    """
+    global _loaded
+    path = pathlib.Path(path or INDEX_PATH)
+    with index_lock(path, exclusive=True):
+        index = load_index(path)
+        index.journal = []
+        try:
+            yield index
+        except BaseException:
+            # The copy in memory may hold changes that never reached the log
+            _loaded = (None, 0, None)
+            raise
+        finally:
+            journal, index.journal = index.journal, None
+        if not journal:
+            return
+        log_size = append_log(path, journal)
+        _loaded = (_loaded[0], log_size, index)
+        try:
+            snapshot_size = path.stat().st_size
+        except FileNotFoundError:
+            snapshot_size = 0
+        if log_size > max(COMPACT_MIN_BYTES, COMPACT_RATIO * snapshot_size):
+            compact(path, index)
+
+def handle(job):
+    """Run one index, unindex or match job.
+
+    index:   {"kind", "doc_id", "text"}        -> {"success", "documents"}
+    unindex: {"kind", "doc_id"}                -> {"success", "removed"}
+    match:   {"kind", "text" | "doc_id" + "from", "top"}
+             -> {"success", "matches", "seconds"}; kind is the collection
+             searched, "from" the kind of the indexed query document
+    """
+    command = job.get("command")
+    kind = job.get("kind")
+    if kind not in KINDS:
+        return {"error": f"kind must be one of: {', '.join(KINDS)}"}
+    started = time.perf_counter()
+
+    if command == "index":
+        if not job.get("doc_id") or job.get("text") is None:
+            return {"error": "index needs doc_id and text"}
+        with updating_index() as index:
+            index.add(kind, str(job["doc_id"]), job["text"])
+            documents = {name: len(docs) for name, docs in index.docs.items()}
+        return {"success": True, "documents": documents}
+
+    if command == "unindex":
+        with updating_index() as index:
+            removed = index.remove(kind, str(job.get("doc_id")))
+        return {"success": True, "removed": removed}
+
+    if command == "match":
+        index = current_index()
+        exclude = None
+        query_kind = job.get("from")
+        if job.get("text") is not None:
+            counts = terms(job["text"])
+        else:
+            query_kind = query_kind or ("resume" if kind == "job" else "job")
+            counts = index.docs.get(query_kind, {}).get(str(job.get("doc_id")))
+            if counts is None:
+                return {"error": f"No indexed {query_kind} with id {job.get('doc_id')}"}
+            if query_kind == kind:
+                exclude = str(job["doc_id"])
+        matches = index.match(counts, kind, top=int(job.get("top") or 10), exclude=exclude,
+                              query_kind=query_kind)
+        return {"success": True, "matches": matches,
+                "seconds": round(time.perf_counter() - started, 4)}
+
+    return {"error": f"Unknown command: {command}"}
@@ -0,0 +1,110 @@
+# metrics.py - Per-call timing and engine attribution for the extraction pipeline
+
+import os
+import io
+import time
+import contextlib
+
+class ExtractionMetrics:
+    """Collects stage timings and the engine that produced the final text"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self.engine = None
+        self.page_count = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time one engine or pipeline step; an exception marks it as failed"""
+        entry = {"stage": name, "status": "ok"}
+        self.stages.append(entry)
+        started = time.perf_counter()
+        try:
+            yield entry
+        except BaseException:
+            entry["status"] = "error"
+            raise
+        finally:
+            entry["seconds"] = round(time.perf_counter() - started, 4)
+
+    def produced(self, engine, text):
+        """Record which engine's output is being returned and pass the text through"""
+        self.engine = engine
+        return text
+
+    def to_dict(self, bytes_in=None, text=None, cache_status=None):
+        return {
+            "engine": self.engine,
+            "bytes_in": bytes_in,
+            "chars_out": len(text) if text is not None else None,
+            "page_count": self.page_count,
+            "cache": cache_status,
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": self.stages,
+        }
+
+# Collector for the call currently being processed; replaced by begin()
+current = ExtractionMetrics()
+
+def begin():
+    """Start collecting metrics for a new call"""
+    global current
+    current = ExtractionMetrics()
+    return current
+
+def stage(name):
+    return current.stage(name)
+
+def produced(engine, text):
+    return current.produced(engine, text)
+
+def set_page_count(page_count):
+    current.page_count = page_count
+
+@contextlib.contextmanager
+def profiled(file_path, mode=None):
+    """Profile the enclosed call when RESUME_PROFILE is 'cprofile' or 'tracemalloc'.
+
+    The report is written next to the upload as <file>.<mode>.txt and its path
+    is stored in the yielded dict under "report".
+    """
+    mode = (mode or os.environ.get("RESUME_PROFILE", "")).lower()
+    info = {"report": None}
+    if mode not in ("cprofile", "tracemalloc"):
+        yield info
+        return
+
+    report_path = f"{file_path}.{mode}.txt"
+    if mode == "cprofile":
+        import pstats
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield info
+        finally:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(40)
+            info["report"] = write_report(report_path, output.getvalue())
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield info
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"current: {current_bytes} bytes, peak: {peak_bytes} bytes", ""]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:25]]
+            info["report"] = write_report(report_path, "\n".join(lines) + "\n")
+
+def write_report(report_path, content):
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return report_path
+    except OSError:
+        return None
@@ -0,0 +1,129 @@
+# ocr.py - Selective, memory-capped Tesseract OCR for pages without a usable text layer
+
+import os
+import re
+import math
+import time
+
+import scratch
+import scheduler
+
+# Upper bound on memory spent on page images in flight (rendered bitmaps plus Tesseract's copies)
+MEMORY_BUDGET = int(float(os.environ.get("RESUME_OCR_MEMORY_MB", "512")) * 1024 * 1024)
+
+# Tesseract runs as a subprocess, so threads are enough to keep several pages busy
+THREADS = max(1, int(os.environ.get("RESUME_OCR_THREADS", "0")) or min(4, os.cpu_count() or 1))
+
+# Tesseract is most accurate around 300 DPI; below 100 small resume fonts stop being legible
+MAX_DPI = 300
+MIN_DPI = 100
+
+# Grayscale page bitmap; Tesseract keeps a few working copies (binarized, scaled) of it
+BYTES_PER_PIXEL = 1
+TESSERACT_OVERHEAD = 4
+
+# US Letter in points, for pages whose size is unknown
+DEFAULT_PAGE_SIZE = (612, 792)
+
+CID_RE = re.compile(r'\(cid:\d+\)')
+
+# (pytesseract, pdf2image) once loaded; most uploads never need OCR, so they aren't imported up front
+engines = None
+
+def load_engines():
+    """Import the OCR libraries on first use; raises ImportError when they aren't installed"""
+    global engines
+    if engines is None:
+        import pytesseract
+        import pdf2image
+        engines = (pytesseract, pdf2image)
+    return engines
+
+def page_needs_ocr(text):
+    """True for a page with no text, or one that is mostly unmapped (cid:N) glyphs"""
+    stripped = (text or "").strip()
+    if not stripped:
+        return True
+    garbled = sum(len(marker) for marker in CID_RE.findall(stripped))
+    return garbled * 2 > len(stripped)
+
+def page_cost(width, height, dpi):
+    """Estimated peak bytes to render and OCR one page of width x height points at dpi"""
+    pixels = (width / 72 * dpi) * (height / 72 * dpi)
+    return int(pixels * BYTES_PER_PIXEL * TESSERACT_OVERHEAD)
+
+def choose_dpi(width, height, memory_share):
+    """Highest DPI (up to MAX_DPI) whose page fits in memory_share, never below MIN_DPI"""
+    cost_at_one_dpi = page_cost(width, height, 1)
+    dpi = int(math.sqrt(memory_share / cost_at_one_dpi)) if cost_at_one_dpi else MAX_DPI
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+def plan(page_sizes, threads, memory_budget):
+    """Pick the thread count and per-thread memory share for a set of pages.
+
+    Threads are dropped before resolution: fewer pages in flight is better
+    than pages rendered too small to read.
+    """
+    threads = max(1, min(threads, len(page_sizes)))
+    largest = max((page_cost(width, height, MIN_DPI) for width, height in page_sizes), default=0)
+    while threads > 1 and largest * threads > memory_budget:
+        threads -= 1
+    return threads, memory_budget // threads
+
+def ocr_page(file_path, number, size, memory_share, directory, timeout, committed=False):
+    """Render one page to a PNG on disk, OCR it and delete the image"""
+    pytesseract, pdf2image = load_engines()
+
+    started = time.perf_counter()
+    dpi = choose_dpi(*size, memory_share)
+    with scheduler.admit("tesseract", memory=page_cost(*size, dpi), committed=committed):
+        # paths_only keeps the bitmap out of this process; Tesseract reads the file itself
+        paths = pdf2image.convert_from_path(str(file_path), dpi=dpi, first_page=number, last_page=number,
+                                            grayscale=True, fmt="png", output_folder=str(directory),
+                                            output_file=f"page-{number}", single_file=True,
+                                            paths_only=True, timeout=timeout)
+        try:
+            text = "".join(pytesseract.image_to_string(path, timeout=timeout) for path in paths)
+        finally:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return number, text, time.perf_counter() - started, dpi
+
+def ocr_pages(file_path, page_sizes, threads=None, memory_budget=None, timeout=None, page_timings=None,
+              committed=False):
+    """OCR the given pages and return {page number: text}.
+
+    page_sizes maps 1-based page numbers to (width, height) in points. Each
+    page is rendered on its own, at a DPI chosen so that the pages in flight
+    stay within memory_budget (RESUME_OCR_MEMORY_MB by default).
+
+    Every page takes its own scheduler slot, but only the first can be
+    turned away as Busy: once it has run, the job is committed and later
+    pages wait for their turn instead of failing a half-done scan. Callers
+    that already produced part of the document pass committed for all pages.
+    """
+    # Fail fast with ImportError when OCR is unavailable
+    load_engines()
+
+    if not page_sizes:
+        return {}
+    threads, memory_share = plan(list(page_sizes.values()), threads or THREADS,
+                                 memory_budget or MEMORY_BUDGET)
+
+    from concurrent.futures import ThreadPoolExecutor
+    first, *rest = sorted(page_sizes.items())
+    with scratch.scratch_dir() as directory:
+        results = [ocr_page(file_path, *first, memory_share, directory, timeout, committed)]
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(ocr_page, file_path, number, size, memory_share, directory, timeout,
+                                   committed=True)
+                       for number, size in rest]
+            results += [future.result() for future in futures]
+
+    if page_timings is not None:
+        page_timings.extend({"engine": "tesseract", "page": number, "seconds": round(seconds, 4), "dpi": dpi}
+                            for number, _, seconds, dpi in results)
+    return {number: text for number, text, _, _ in results}
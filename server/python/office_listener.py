@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# office_listener.py - One warm headless LibreOffice instance serving Word-to-PDF conversions
+#
+# Usage: python3 office_listener.py --profile=<dir> [--soffice=soffice]
+#
+# Needs the LibreOffice UNO bindings (python3-uno, or LibreOffice's bundled python).
+# Speaks NDJSON on stdin/stdout like `wrapper.py serve`: prints {"ready": true, "pid"}
+# once soffice accepts connections, then answers
+#   {"id", "source", "outdir"} -> {"id", "pdf"} | {"id", "error"}
+#   {"id", "ping": true}       -> {"id", "pong": true}
+# Exits, taking soffice with it, when stdin closes or soffice dies.
+
+import os
+import sys
+import json
+import time
+import signal
+import pathlib
+import subprocess
+
+# How long soffice gets to start accepting connections
+START_TIMEOUT = float(os.environ.get("RESUME_ENGINE_TIMEOUT", "60"))
+
+def option_value(name, default=None):
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+def properties(**values):
+    from com.sun.star.beans import PropertyValue
+    return tuple(PropertyValue(Name=name, Value=value) for name, value in values.items())
+
+def connect(pipe_name, soffice):
+    """Wait for soffice to accept UNO connections and return its Desktop"""
+    import uno
+    from com.sun.star.connection import NoConnectException
+
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+    deadline = time.monotonic() + START_TIMEOUT
+    while True:
+        try:
+            context = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+            return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        except NoConnectException:
+            if soffice.poll() is not None:
+                raise RuntimeError(f"soffice exited with status {soffice.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError("soffice did not accept connections in time")
+            time.sleep(0.1)
+
+def convert(desktop, source, outdir):
+    """Load source hidden and read-only, and export it next to outdir as PDF"""
+    import uno
+
+    source = pathlib.Path(source)
+    target = pathlib.Path(outdir) / (source.stem + ".pdf")
+    document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(str(source.resolve())), "_blank", 0,
+                                            properties(Hidden=True, ReadOnly=True))
+    if document is None:
+        raise RuntimeError(f"LibreOffice could not open {source.name}")
+    try:
+        document.storeToURL(uno.systemPathToFileUrl(str(target.resolve())),
+                            properties(FilterName="writer_pdf_Export"))
+    finally:
+        document.close(True)
+    return target
+
+def main():
+    profile = pathlib.Path(option_value("profile"))
+    pipe_name = f"resume-office-{os.getpid()}"
+    soffice = subprocess.Popen(
+        [option_value("soffice", "soffice"), "--headless", "--invisible", "--nologo", "--norestore",
+         "--nodefault", "--nolockcheck", f"-env:UserInstallation={profile.resolve().as_uri()}",
+         f"--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=sys.stderr)
+
+    def emit(payload):
+        sys.stdout.write(json.dumps(payload) + "\n")
+        sys.stdout.flush()
+
+    # The pool kills the whole process group on timeout; a plain SIGTERM should still stop soffice
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    try:
+        desktop = connect(pipe_name, soffice)
+        emit({"ready": True, "pid": os.getpid()})
+
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if soffice.poll() is not None:
+                emit({"id": job.get("id"), "error": f"soffice exited with status {soffice.returncode}"})
+                sys.exit(1)
+            try:
+                if job.get("ping"):
+                    desktop.getComponents()
+                    emit({"id": job.get("id"), "pong": True})
+                else:
+                    emit({"id": job.get("id"), "pdf": str(convert(desktop, job["source"], job["outdir"]))})
+            except Exception as e:
+                emit({"id": job.get("id"), "error": str(e)})
+    finally:
+        soffice.terminate()
+        try:
+            soffice.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            soffice.kill()
+
+if __name__ == "__main__":
+    main()
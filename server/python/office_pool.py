@@ -0,0 +1,210 @@
+# office_pool.py - Pool of warm LibreOffice listeners for Word-to-PDF conversion
+
+import os
+import sys
+import json
+import time
+import queue
+import shlex
+import shutil
+import signal
+import atexit
+import select
+import tempfile
+import threading
+import subprocess
+
+LISTENER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "office_listener.py")
+
+# Listeners per process; each one is a soffice instance (~150 MB), 0 disables the pool
+POOL_SIZE = int(os.environ.get("RESUME_OFFICE_LISTENERS", "1"))
+
+# Idle listeners are pinged before reuse once this many seconds have passed
+HEALTH_INTERVAL = float(os.environ.get("RESUME_OFFICE_HEALTH_INTERVAL", "30"))
+
+class ListenerError(Exception):
+    """A listener failed to start, crashed or timed out"""
+
+def listener_command():
+    """Command that starts one listener; RESUME_OFFICE_LISTENER swaps in another implementation.
+
+    Any program that speaks office_listener.py's NDJSON protocol and accepts
+    --profile=<dir> works, e.g. benchmarks/office_stub_listener.py where soffice
+    isn't installed.
+    """
+    override = os.environ.get("RESUME_OFFICE_LISTENER")
+    if override:
+        return shlex.split(override)
+    # The UNO bindings usually live in the system or LibreOffice python, not a virtualenv
+    return [os.environ.get("RESUME_OFFICE_PYTHON", sys.executable), LISTENER_SCRIPT]
+
+class Listener:
+    """One listener process with its own LibreOffice profile directory"""
+
+    def __init__(self, command, start_timeout):
+        self.command = command
+        self.start_timeout = start_timeout
+        self.process = None
+        self.profile = None
+        self.ready = False
+        self.last_used = 0.0
+        self.next_id = 0
+
+    def start(self):
+        """Spawn the listener; the ready handshake is read on first use"""
+        # A private profile avoids the lock conflicts of concurrent soffice runs
+        self.profile = tempfile.mkdtemp(prefix="resume-office-profile-")
+        self.process = subprocess.Popen(self.command + [f"--profile={self.profile}"],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=sys.stderr, start_new_session=True)
+        self.ready = False
+        self.last_used = time.monotonic()
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.kill()
+        if self.profile:
+            shutil.rmtree(self.profile, ignore_errors=True)
+        self.process = self.profile = None
+
+    def kill(self):
+        """Kill the listener and the soffice it started (same process group)"""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            pass
+        self.process.wait()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def read_line(self, timeout):
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            self.kill()
+            raise ListenerError(f"listener did not answer within {timeout}s")
+        line = self.process.stdout.readline()
+        if not line:
+            raise ListenerError(f"listener exited with status {self.process.wait()}")
+        return json.loads(line)
+
+    def request(self, payload, timeout):
+        """Send one job and wait for its reply, waiting for the handshake first if needed"""
+        if not self.alive():
+            raise ListenerError("listener is not running")
+        if not self.ready:
+            self.read_line(self.start_timeout)
+            self.ready = True
+        self.next_id += 1
+        try:
+            self.process.stdin.write((json.dumps({"id": self.next_id, **payload}) + "\n").encode())
+            self.process.stdin.flush()
+        except OSError as e:
+            raise ListenerError(f"listener is not accepting jobs: {e}")
+        reply = self.read_line(timeout)
+        self.last_used = time.monotonic()
+        return reply
+
+    def healthy(self, timeout):
+        """Process is running and, if idle for a while, answers a ping"""
+        if not self.alive():
+            return False
+        if self.ready and time.monotonic() - self.last_used < HEALTH_INTERVAL:
+            return True
+        try:
+            return bool(self.request({"ping": True}, timeout).get("pong"))
+        except (ListenerError, ValueError):
+            return False
+
+class OfficePool:
+    """Fixed set of listeners; each conversion borrows one, so size jobs run in parallel"""
+
+    def __init__(self, size, command=None, start_timeout=60.0):
+        self.listeners = [Listener(command or listener_command(), start_timeout) for _ in range(max(1, size))]
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        for listener in self.listeners:
+            listener.start()
+            self.idle.put(listener)
+
+    def convert(self, source, outdir, timeout):
+        """Convert source to a PDF in outdir and return its path.
+
+        A listener that is dead or fails its health check is restarted before
+        use, and one that crashes or times out mid-job is restarted and the
+        job retried once on the fresh instance.
+        """
+        listener = self.idle.get()
+        try:
+            for attempt in range(2):
+                if not listener.healthy(timeout):
+                    print("Restarting unhealthy LibreOffice listener", file=sys.stderr)
+                    listener.restart()
+                try:
+                    reply = listener.request({"source": str(source), "outdir": str(outdir)}, timeout)
+                except (ListenerError, ValueError) as e:
+                    if attempt:
+                        raise ListenerError(str(e))
+                    print(f"LibreOffice listener failed: {e}, restarting", file=sys.stderr)
+                    listener.restart()
+                    continue
+                if "error" in reply:
+                    # The document itself failed to convert; the listener is still usable
+                    raise ListenerError(reply["error"])
+                return reply["pdf"]
+        finally:
+            self.idle.put(listener)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        for listener in self.listeners:
+            listener.stop()
+
+pool = None
+
+# Set by serve(): a long-lived process may start the pool, but only once it converts a Word document
+enabled = False
+enabled_timeout = 60.0
+start_lock = threading.Lock()
+
+def enable(timeout=60.0):
+    """Allow this process to start the pool on its first Word conversion (serve mode).
+
+    Most workers only ever extract text, so they never pay for the listeners.
+    """
+    global enabled, enabled_timeout
+    enabled = True
+    enabled_timeout = timeout
+
+def start(size=None, timeout=60.0):
+    """Start the process-wide pool; listeners warm up in the background"""
+    global pool
+    size = POOL_SIZE if size is None else size
+    with start_lock:
+        if pool is not None or size <= 0:
+            return pool
+        if not os.environ.get("RESUME_OFFICE_LISTENER") and shutil.which("soffice") is None:
+            return None
+        pool = OfficePool(size, start_timeout=timeout)
+        atexit.register(pool.close)
+        return pool
+
+def convert(source, outdir, timeout):
+    """Convert with the warm pool, starting it first if enabled; returns None without a pool"""
+    if pool is None and enabled:
+        start(timeout=enabled_timeout)
+    if pool is None:
+        return None
+    return pool.convert(source, outdir, timeout)
@@ -0,0 +1,120 @@
+# page_stream.py - Page-at-a-time PDF text extraction with early stop and a memory ceiling
+
+import os
+import sys
+import time
+import resource
+
+import pdfplumber
+
+from ocr import ocr_pages, page_needs_ocr
+from resume_convert import ENGINE_TIMEOUT
+
+MB = 1024 * 1024
+
+# Ceiling on RSS growth during one streaming job, checked after every page; 0 disables it
+JOB_MEMORY_LIMIT = int(float(os.environ.get("RESUME_JOB_MEMORY_MB", "0")) * MB)
+
+# Default early-stop limits for streaming jobs; 0 means read the whole document
+MAX_PAGES = int(os.environ.get("RESUME_STREAM_MAX_PAGES", "0"))
+MAX_CHARS = int(os.environ.get("RESUME_STREAM_MAX_CHARS", "0"))
+
+class MemoryLimitExceeded(Exception):
+    """A streaming job grew past its memory ceiling and was stopped"""
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No /proc (macOS): the peak is the best available approximation
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class PageStream:
+    """Iterate over a PDF's pages as {"page", "text", "engine", "seconds"} dicts.
+
+    Each page's parsed objects and layout caches are released as soon as its
+    text is read, so memory stays flat however long the document is.
+    Iteration stops early once max_pages pages or max_chars characters have
+    been produced (the last page is cut at the limit), and raises
+    MemoryLimitExceeded when RSS has grown by more than memory_limit bytes.
+    The ceiling is checked between pages, so it stops a long document that
+    keeps growing but not a single page that blows up while it is parsed.
+    Pages without a usable text layer are OCRed one at a time when ocr is set.
+    After iteration, pages, chars and stopped ("max_pages", "max_chars" or
+    None) describe what was produced.
+    """
+
+    def __init__(self, file_path, max_pages=None, max_chars=None, memory_limit=None, ocr=True):
+        self.file_path = file_path
+        self.max_pages = MAX_PAGES if max_pages is None else max_pages
+        self.max_chars = MAX_CHARS if max_chars is None else max_chars
+        self.memory_limit = JOB_MEMORY_LIMIT if memory_limit is None else memory_limit
+        self.ocr = ocr
+        self.page_count = None
+        self.pages = 0
+        self.chars = 0
+        self.stopped = None
+        self.engines = set()
+
+    def __iter__(self):
+        baseline = current_rss()
+        with pdfplumber.open(str(self.file_path)) as pdf:
+            self.page_count = len(pdf.pages)
+            for number, page in enumerate(pdf.pages, start=1):
+                if self.max_pages and self.pages >= self.max_pages:
+                    self.stopped = "max_pages"
+                    return
+
+                started = time.perf_counter()
+                size = (page.width, page.height)
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    # Drops the page's parsed objects and layout caches
+                    page.close()
+                engine = "pdfplumber"
+
+                if self.ocr and page_needs_ocr(text):
+                    ocr_text = self.ocr_page(number, size)
+                    if ocr_text and ocr_text.strip():
+                        text, engine = ocr_text, "tesseract"
+
+                if self.max_chars and self.chars + len(text) >= self.max_chars:
+                    text = text[:self.max_chars - self.chars]
+                    self.stopped = "max_chars"
+
+                self.pages += 1
+                self.chars += len(text)
+                self.engines.add(engine)
+                yield {"page": number, "text": text, "engine": engine,
+                       "seconds": round(time.perf_counter() - started, 4)}
+                if self.stopped:
+                    return
+
+                growth = current_rss() - baseline
+                if self.memory_limit and growth > self.memory_limit:
+                    raise MemoryLimitExceeded(
+                        f"Extraction used {growth // MB} MB after {number} pages, "
+                        f"over the {self.memory_limit // MB} MB limit")
+
+    def ocr_page(self, number, size):
+        """OCR a single page, disabling OCR for the rest of the stream if it is unavailable"""
+        try:
+            # Pages already streamed out can't be taken back, so later ones wait rather than fail
+            return ocr_pages(self.file_path, {number: size}, threads=1,
+                             timeout=ENGINE_TIMEOUT, committed=self.pages > 0).get(number)
+        except ImportError:
+            self.ocr = False
+        except Exception as e:
+            print(f"OCR of page {number} failed: {e}")
+        return None
+
+    @property
+    def engine(self):
+        """pdfplumber, tesseract or pdfplumber+tesseract, matching extract_text's attribution"""
+        if not self.engines:
+            return None
+        return "+".join(sorted(self.engines, key=("pdfplumber", "tesseract").index))
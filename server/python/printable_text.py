@@ -0,0 +1,77 @@
+# printable_text.py - Last-resort text extraction that keeps printable ASCII bytes
+
+import re
+import mmap
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+CID_RE = re.compile(rb'\(cid:\d+\)')
+# Matches an unfinished "(cid:123" at the end of a chunk that may complete in the next one
+CID_PREFIX_RE = re.compile(rb'\((?:c(?:i(?:d(?::\d*)?)?)?)?')
+
+def deletion_table(keep_whitespace):
+    """Bytes to drop: everything outside ASCII 32-126, optionally keeping tab and newline"""
+    keep = set(range(32, 127))
+    if keep_whitespace:
+        keep.update((9, 10))
+    return bytes(b for b in range(256) if b not in keep)
+
+DELETE_KEEP_WHITESPACE = deletion_table(True)
+DELETE_PRINTABLE_ONLY = deletion_table(False)
+
+def iter_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Yield the file contents in chunks from a read-only memory map"""
+    with open(file_path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory-mapped
+            return
+        with mapped:
+            for start in range(0, len(mapped), chunk_size):
+                yield mapped[start:start + chunk_size]
+
+def extract_printable_text(file_path, keep_whitespace=True, strip_cid=False, chunk_size=CHUNK_SIZE):
+    """Keep printable ASCII bytes, collapse whitespace runs and optionally drop CID markers.
+
+    Equivalent to filtering the file byte by byte, then applying
+    re.sub(r'\\s+', ' ') and (when strip_cid is set) re.sub(r'\\(cid:\\d+\\)', '')
+    to the whole text, but done per chunk so time is linear in the file size.
+    """
+    delete = DELETE_KEEP_WHITESPACE if keep_whitespace else DELETE_PRINTABLE_ONLY
+    parts = []
+    ends_with_space = False
+    pending = b''
+
+    for chunk in iter_chunks(file_path, chunk_size):
+        filtered = chunk.translate(None, delete)
+        if not filtered:
+            continue
+        # bytes.split() collapses whitespace runs in C; restore the edge spaces it drops
+        collapsed = b' '.join(filtered.split())
+        if filtered[:1].isspace() and not ends_with_space:
+            collapsed = b' ' + collapsed
+        if filtered[-1:].isspace() and collapsed and collapsed[-1:] != b' ':
+            collapsed += b' '
+        if not collapsed:
+            continue
+        ends_with_space = collapsed[-1:] == b' '
+
+        if not strip_cid:
+            parts.append(collapsed)
+            continue
+
+        # Hold back a trailing partial CID marker until the next chunk arrives
+        pending += collapsed
+        ready = pending
+        start = pending.rfind(b'(')
+        if start != -1 and CID_PREFIX_RE.fullmatch(pending, start):
+            ready, pending = pending[:start], pending[start:]
+        else:
+            pending = b''
+        parts.append(CID_RE.sub(b'', ready))
+
+    if pending:
+        parts.append(CID_RE.sub(b'', pending))
+
+    return b''.join(parts).decode('ascii').strip()
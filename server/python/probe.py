@@ -0,0 +1,110 @@
+# probe.py - Classify an upload once and share the result across the pipeline
+
+import re
+import mmap
+import codecs
+import pathlib
+from collections import namedtuple
+
+# libmagic only needs the start of the file to identify every format we handle
+HEADER_BYTES = 8192
+
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+TEXT_EXTENSIONS = ('.txt', '.md')
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+class FileProbe(namedtuple("FileProbe", "format mime extension size page_count has_text_layer encrypted",
+                           defaults=(None, None, False))):
+    """What the pipeline needs to know about an upload before choosing engines.
+
+    format is one of "pdf", "docx", "doc", "text" or "binary". For PDFs,
+    page_count is None and has_text_layer is None when the page tree or fonts
+    are hidden in compressed object streams and can't be seen without parsing.
+    An immutable named tuple: a frozen dataclass would load dataclasses and
+    inspect, a sizeable share of every cold start.
+    """
+    __slots__ = ()
+
+    @property
+    def needs_ocr(self):
+        """True when the PDF definitely has no fonts, so text engines can't succeed"""
+        return self.format == "pdf" and self.has_text_layer is False
+
+def classify(mime, extension, header):
+    """One rule for every path: content first, extension only to break ties"""
+    if header.startswith(b"%PDF") or mime == "application/pdf":
+        return "pdf"
+    if "wordprocessingml" in mime or (mime == "application/zip" and extension == ".docx"):
+        return "docx"
+    if "msword" in mime or "word" in mime:
+        return "doc"
+    if mime.startswith("text/"):
+        return "text"
+    if extension == ".pdf":
+        # Let the PDF engines try files with junk before the %PDF header
+        return "pdf"
+    if extension in TEXT_EXTENSIONS:
+        return "text"
+    return "binary"
+
+def sniff(header, extension):
+    """MIME type for headers that settle the format on their own, else None.
+
+    Covers the common uploads (PDF, DOCX, UTF-8 text) so they skip loading
+    libmagic, which costs more than the rest of startup together.
+    """
+    if header.startswith(b"%PDF"):
+        return "application/pdf"
+    if header.startswith(b"PK\x03\x04") and b"word/" in header:
+        return DOCX_MIME
+    if extension in TEXT_EXTENSIONS and b"\0" not in header:
+        try:
+            # Incremental, so a multi-byte character cut at the end of the header isn't an error
+            codecs.getincrementaldecoder("utf-8")().decode(header, final=False)
+            return "text/plain"
+        except UnicodeDecodeError:
+            return None
+    return None
+
+def magic_mime(header):
+    import magic
+    return magic.from_buffer(header, mime=True)
+
+def inspect_pdf(content):
+    """Scan raw PDF bytes for page objects, fonts and an encryption dictionary"""
+    page_count = len(PDF_PAGE_RE.findall(content)) or None
+    compressed_objects = content.find(b"/ObjStm") != -1
+    if content.find(b"/Font") != -1:
+        has_text_layer = True
+    else:
+        has_text_layer = None if compressed_objects else False
+    return page_count, has_text_layer, content.find(b"/Encrypt") != -1
+
+def probe_file(file_path, data=None):
+    """Probe a file on disk, or in-memory bytes whose original name is file_path"""
+    extension = pathlib.Path(file_path).suffix.lower()
+
+    if data is not None:
+        header = bytes(data[:HEADER_BYTES])
+        size = len(data)
+    else:
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_BYTES)
+            size = f.seek(0, 2)
+
+    mime = sniff(header, extension) or magic_mime(header)
+    file_format = classify(mime, extension, header)
+    if file_format != "pdf":
+        return FileProbe(file_format, mime, extension, size)
+
+    if data is not None:
+        details = inspect_pdf(data)
+    elif size == 0:
+        details = (None, False, False)
+    else:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            details = inspect_pdf(content)
+    page_count, has_text_layer, encrypted = details
+    return FileProbe(file_format, mime, extension, size, page_count, has_text_layer, encrypted)
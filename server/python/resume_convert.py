@@ -1,14 +1,54 @@
 # resumebackend/convert.py
-import subprocess, tempfile, pathlib, magic
-import pdfplumber  # For extracting text from PDF
+import subprocess, pathlib, os, time, io
+# pdfplumber (the whole pdfminer stack) and the DOCX reader are imported by the
+# branches that use them, so a text upload never pays for loading either
+from printable_text import extract_printable_text
+from probe import probe_file
+from ocr import DEFAULT_PAGE_SIZE, load_engines, ocr_pages, page_needs_ocr
+import metrics
+import scratch
+import scheduler
+import office_pool
 
-def convert(uploaded_path: pathlib.Path) -> pathlib.Path:
-    """Convert uploaded file to PDF format"""
-    mime = magic.from_file(str(uploaded_path), mime=True)
-    outdir = tempfile.mkdtemp()
+# Number of processes used to extract PDF pages in parallel (1 = sequential)
+PAGE_WORKERS = int(os.environ.get("RESUME_PAGE_WORKERS", "1"))
+
+# Deadline in seconds for each external engine or conversion subprocess
+ENGINE_TIMEOUT = float(os.environ.get("RESUME_ENGINE_TIMEOUT", "60"))
+
+# Engines that read the PDF text layer; pointless on scanned documents
+TEXT_LAYER_ENGINES = ("pdfplumber", "pdftotext", "ghostscript")
+
+def usable_text(text: str, min_length: int = 0) -> bool:
+    """Quality check shared by the PDF engines: non-empty, long enough, not CID-garbled"""
+    stripped = (text or "").strip()
+    return bool(stripped) and len(stripped) > min_length and not stripped.startswith("(cid:")
+
+def decode_text(data: bytes) -> str:
+    """Decode a text document as open(path, 'r') reads it: UTF-8, universal newlines.
+    
+    Undecodable bytes are replaced. Uploads from memory and from disk go
+    through here so they share one cache entry with identical text.
+    """
+    try:
+        return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').read()
+    except UnicodeDecodeError:
+        return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='replace').read()
+
+def probe_once(file_path: pathlib.Path, probe=None):
+    """Return the caller's probe, or classify the file now"""
+    if probe is not None:
+        return probe
+    with metrics.stage("probe"):
+        return probe_file(file_path)
 
+def convert(uploaded_path: pathlib.Path, probe=None) -> pathlib.Path:
+    """Convert uploaded file to PDF format"""
+    probe = probe_once(uploaded_path, probe)
+    outdir = scratch.output_dir()
+    
     # For text files, we'll create a simple text file with the content
-    if mime.startswith("text/"):
+    if probe.format == "text":
         out = pathlib.Path(outdir) / "resume.txt"
         with open(uploaded_path, 'r', encoding='utf-8') as src:
             with open(out, 'w', encoding='utf-8') as dst:
@@ -16,23 +56,39 @@ def convert(uploaded_path: pathlib.Path) -> pathlib.Path:
         return out
     
     # For PDFs, optimize them
-    elif mime.startswith("application/pdf"):
+    elif probe.format == "pdf":
         out = pathlib.Path(outdir) / "resume.pdf"
-        subprocess.run(["gs", "-dNOPAUSE", "-dBATCH",
-                        "-sDEVICE=pdfwrite", "-sOutputFile="+str(out),
-                        "-dPDFSETTINGS=/prepress", str(uploaded_path)],
-                        check=True)
+        with scheduler.admit("ghostscript", probe.size, probe.page_count), metrics.stage("ghostscript-pdfwrite"):
+            subprocess.run(["gs", "-dNOPAUSE", "-dBATCH",
+                            "-sDEVICE=pdfwrite", "-sOutputFile="+str(out),
+                            "-dPDFSETTINGS=/prepress", str(uploaded_path)],
+                            check=True, timeout=ENGINE_TIMEOUT)
     # For Word documents
-    elif "word" in mime:
-        subprocess.run(["soffice","--headless","--convert-to","pdf:writer_pdf_Export",
-                        "--outdir", outdir, str(uploaded_path)], check=True)
-        out = next(pathlib.Path(outdir).glob("*.pdf"))
+    elif probe.format in ("docx", "doc"):
+        out = None
+        try:
+            with scheduler.admit("soffice-listener", probe.size), metrics.stage("soffice-listener"):
+                pdf = office_pool.convert(uploaded_path, outdir, timeout=ENGINE_TIMEOUT)
+            if pdf:
+                out = pathlib.Path(pdf)
+        except office_pool.ListenerError as e:
+            print(f"LibreOffice listener failed: {e}, starting soffice directly")
+        if out is None:
+            # Cold start with a throwaway profile so concurrent conversions don't share one
+            with scheduler.admit("soffice", probe.size), metrics.stage("soffice"), \
+                    scratch.scratch_dir() as profile:
+                subprocess.run(["soffice","--headless","--convert-to","pdf:writer_pdf_Export",
+                                f"-env:UserInstallation={profile.as_uri()}",
+                                "--outdir", outdir, str(uploaded_path)], check=True,
+                               timeout=ENGINE_TIMEOUT)
+            out = next(pathlib.Path(outdir).glob("*.pdf"))
     # For other file types (assume markdown/text)
     else:
         out = pathlib.Path(outdir) / "resume.pdf"
         try:
-            subprocess.run(["pandoc", str(uploaded_path), "-o", str(out),
-                           "--pdf-engine=xelatex"], check=True)
+            with scheduler.admit("pandoc", probe.size), metrics.stage("pandoc"):
+                subprocess.run(["pandoc", str(uploaded_path), "-o", str(out),
+                               "--pdf-engine=xelatex"], check=True, timeout=ENGINE_TIMEOUT)
         except Exception as e:
             # Fallback to copying as text if conversion fails
             print(f"Conversion error: {e}, falling back to text copy")
@@ -43,125 +99,279 @@ def convert(uploaded_path: pathlib.Path) -> pathlib.Path:
     
     return out
 
-def extract_text(file_path: pathlib.Path) -> str:
-    """Extract text from a file - supports PDF, DOCX and text files"""
-    mime = magic.from_file(str(file_path), mime=True)
-    file_ext = file_path.suffix.lower()
+def page_ranges(page_count: int, workers: int):
+    """Split pages 1..page_count into one contiguous range per worker"""
+    size = -(-page_count // workers)
+    return [(start, min(start + size - 1, page_count))
+            for start in range(1, page_count + 1, size)]
+
+def pdfplumber_page_range(file_path: str, first_page: int, last_page: int):
+    """Extract text for pages first_page..last_page with per-page timings"""
+    import pdfplumber
+    results = []
+    with pdfplumber.open(file_path) as pdf:
+        for number in range(first_page, last_page + 1):
+            started = time.perf_counter()
+            page = pdf.pages[number - 1]
+            page_text = page.extract_text() or ""
+            # Release the page's parsed objects instead of holding every page until the end
+            page.close()
+            results.append((number, page_text, time.perf_counter() - started))
+    return results
+
+def pdf_page_sizes(file_path: pathlib.Path):
+    """Return [(width, height)] in points for every page, falling back to Letter-sized pages"""
+    try:
+        import pdfplumber
+        with pdfplumber.open(str(file_path)) as pdf:
+            return [(page.width, page.height) for page in pdf.pages]
+    except Exception as e:
+        print(f"Could not read page sizes with pdfplumber: {e}")
+    from pdf2image import pdfinfo_from_path
+    page_count = int(pdfinfo_from_path(str(file_path), timeout=ENGINE_TIMEOUT)["Pages"])
+    return [DEFAULT_PAGE_SIZE] * page_count
+
+def ocr_selected_pages(file_path: pathlib.Path, numbers, page_sizes, page_timings=None):
+    """OCR only the given 1-based page numbers; returns {number: text}"""
+    sizes = {number: page_sizes[number - 1] if number <= len(page_sizes) else DEFAULT_PAGE_SIZE
+             for number in numbers}
+    with metrics.stage("tesseract"):
+        return ocr_pages(file_path, sizes, timeout=ENGINE_TIMEOUT, page_timings=page_timings)
+
+def run_pages(page_function, file_path: pathlib.Path, page_count: int,
+              workers: int, engine: str, page_timings=None):
+    """Run page_function over all pages, in parallel when workers > 1.
+    
+    Returns [(number, text, seconds)] in page order.
+    """
+    workers = max(1, min(workers, page_count))
+    # In-memory documents are passed as they are (each worker process gets a copy)
+    source = file_path if isinstance(file_path, io.BytesIO) else str(file_path)
+    if workers == 1:
+        pages = page_function(source, 1, page_count)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(page_function, source, first, last)
+                       for first, last in page_ranges(page_count, workers)]
+            pages = [page for future in futures for page in future.result()]
+    
+    if page_timings is not None:
+        page_timings.extend({"engine": engine, "page": number, "seconds": round(seconds, 4)}
+                            for number, _, seconds in pages)
+    return pages
+
+def extract_pages(page_function, file_path: pathlib.Path, page_count: int,
+                  workers: int, engine: str, page_timings=None) -> str:
+    """Run page_function over all pages and join their text in page order"""
+    pages = run_pages(page_function, file_path, page_count, workers, engine, page_timings)
+    return "".join(page_text + "\n\n" for _, page_text, _ in pages)
+
+def extract_text_from_buffer(data: bytes, probe, page_workers: int = None, page_timings: list = None):
+    """Extract text from document bytes without touching the disk.
+    
+    Covers the engines that can read from memory (DOCX streaming, plain text,
+    pdfplumber), producing the same text as extract_text on the file; PDF
+    pages go through the same page pipeline (page_workers, page_timings).
+    Returns (text, engines_tried); text is None when the document needs the
+    external tools or OCR, which only accept paths.
+    """
+    if page_workers is None:
+        page_workers = PAGE_WORKERS
+    tried = []
+    
+    if probe.format == "docx":
+        try:
+            from docx_text import extract_docx_text
+            with metrics.stage("docx-stream"):
+                extracted_text = extract_docx_text(io.BytesIO(data))
+            if len(extracted_text.strip()) > 20:
+                return metrics.produced("docx-stream", extracted_text.strip()), tried
+        except Exception as e:
+            print(f"Error extracting DOCX: {e}")
+    
+    if probe.format == "text":
+        return metrics.produced("text", decode_text(data)), tried
+    
+    # Scanned PDFs go straight to OCR, which needs a file on disk
+    if probe.format == "pdf" and not probe.needs_ocr:
+        try:
+            import pdfplumber
+            timings = []
+            with metrics.stage("pdfplumber"):
+                source = io.BytesIO(data)
+                with pdfplumber.open(source) as pdf:
+                    page_count = len(pdf.pages)
+                metrics.set_page_count(page_count)
+                pages = run_pages(pdfplumber_page_range, source, page_count,
+                                  page_workers, "pdfplumber", timings)
+                text = "".join(page_text + "\n\n" for _, page_text, _ in pages)
+            # Pages without a usable text layer need OCR, which reads a file:
+            # extract_text reruns pdfplumber there and OCRs just those pages
+            if any(page_needs_ocr(page_text) for _, page_text, _ in pages):
+                print("PDF has pages that need OCR, extracting from a scratch copy")
+                return None, tried
+            tried.append("pdfplumber")
+            if usable_text(text):
+                if page_timings is not None:
+                    page_timings.extend(timings)
+                return metrics.produced("pdfplumber", text.strip()), tried
+        except Exception as e:
+            tried.append("pdfplumber")
+            print(f"Error with pdfplumber extraction: {e}")
+    
+    return None, tried
+
+def extract_text(file_path: pathlib.Path, page_workers: int = None, page_timings: list = None,
+                 skip_engines=(), probe=None) -> str:
+    """Extract text from a file - supports PDF, DOCX and text files
     
-    # Handle DOCX files first (before checking MIME type)
-    if file_ext == '.docx':
+    PDF pages are extracted by page_workers processes (RESUME_PAGE_WORKERS by
+    default); per-page timings are appended to page_timings when given.
+    PDF engines named in skip_engines (e.g. after losing a race) are not retried.
+    A PDF the probe found without any fonts skips the text engines and is OCRed.
+    Only pages pdfplumber finds empty or CID-garbled are rasterized for OCR;
+    pages with a good text layer keep their extracted text.
+    """
+    if page_workers is None:
+        page_workers = PAGE_WORKERS
+    probe = probe_once(file_path, probe)
+    
+    # Handle DOCX files first
+    if probe.format == "docx":
         try:
-            from docx import Document
-            doc = Document(str(file_path))
-            
-            # Extract text from all paragraphs
-            full_text = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    full_text.append(paragraph.text.strip())
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            full_text.append(cell.text.strip())
-            
-            extracted_text = '\n'.join(full_text)
+            from docx_text import extract_docx_text
+            with metrics.stage("docx-stream"):
+                extracted_text = extract_docx_text(file_path)
             if len(extracted_text.strip()) > 20:
-                return extracted_text.strip()
+                return metrics.produced("docx-stream", extracted_text.strip())
             else:
                 print("DOCX extraction resulted in short text, trying fallback")
         except Exception as e:
             print(f"Error extracting DOCX: {e}")
     
     # For text files, just read the content
-    if mime.startswith("text/") or file_ext == ".txt":
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with binary mode if UTF-8 fails
-            with open(file_path, 'rb') as f:
-                return f.read().decode('utf-8', errors='replace')
+    if probe.format == "text":
+        with open(file_path, 'rb') as f:
+            return metrics.produced("text", decode_text(f.read()))
     
     # For PDF files, try multiple extraction methods
-    elif mime.startswith("application/pdf"):
+    elif probe.format == "pdf":
+        page_count = probe.page_count or 0
+        if page_count:
+            metrics.set_page_count(page_count)
+        if probe.needs_ocr:
+            print("PDF has no text layer, going straight to OCR")
+            skip_engines = tuple(skip_engines) + TEXT_LAYER_ENGINES
+        
+        pages = None        # pdfplumber's [(number, text, seconds)]
+        page_sizes = None
+        ocr_numbers = None  # pages that need OCR; every page when pdfplumber didn't run
+        ocr_failed = False
+        
         # Method 1: pdfplumber
-        try:
-            text = ""
-            with pdfplumber.open(str(file_path)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text() or ""
-                    text += page_text + "\n\n"
-            
-            # Check if we got meaningful text
-            if text.strip() and not text.strip().startswith("(cid:"):
-                return text.strip()
-            # If text contains CID markers, it's probably encoded improperly
-            print("pdfplumber extraction resulted in CID markers, trying alternate method")
-        except Exception as e:
-            print(f"Error with pdfplumber extraction: {e}")
+        if "pdfplumber" not in skip_engines:
+            try:
+                import pdfplumber
+                with metrics.stage("pdfplumber"):
+                    with pdfplumber.open(str(file_path)) as pdf:
+                        page_sizes = [(page.width, page.height) for page in pdf.pages]
+                    page_count = len(page_sizes)
+                    metrics.set_page_count(page_count)
+                    pages = run_pages(pdfplumber_page_range, file_path, page_count,
+                                      page_workers, "pdfplumber", page_timings)
+                    text = "".join(page_text + "\n\n" for _, page_text, _ in pages)
+                ocr_numbers = [number for number, page_text, _ in pages if page_needs_ocr(page_text)]
+                
+                # Mixed documents: OCR just the scanned or garbled pages and keep the rest
+                if ocr_numbers and len(ocr_numbers) < len(pages):
+                    try:
+                        print(f"OCR for {len(ocr_numbers)} of {len(pages)} pages without usable text")
+                        ocr_texts = ocr_selected_pages(file_path, ocr_numbers, page_sizes, page_timings)
+                        merged = "".join((ocr_texts.get(number) or page_text) + "\n\n"
+                                         for number, page_text, _ in pages)
+                        if usable_text(merged):
+                            return metrics.produced("pdfplumber+tesseract", merged.strip())
+                    except ImportError:
+                        print("OCR libraries not available")
+                        ocr_failed = True
+                    except Exception as e:
+                        print(f"OCR extraction failed: {e}")
+                        ocr_failed = True
+                
+                # Check if we got meaningful text
+                if usable_text(text):
+                    return metrics.produced("pdfplumber", text.strip())
+                # If text contains CID markers, it's probably encoded improperly
+                print("pdfplumber extraction resulted in CID markers, trying alternate method")
+            except Exception as e:
+                print(f"Error with pdfplumber extraction: {e}")
         
         # Method 2: Try using pdftotext if available (part of poppler-utils)
-        try:
-            output = subprocess.check_output(
-                ["pdftotext", str(file_path), "-"],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            if output.strip() and not output.strip().startswith("(cid:"):
-                return output.strip()
-            print("pdftotext extraction had issues, trying next method")
-        except (subprocess.SubprocessError, FileNotFoundError) as e:
-            print(f"pdftotext extraction failed or not installed: {e}")
+        if "pdftotext" not in skip_engines:
+            try:
+                with scheduler.admit("pdftotext", probe.size, probe.page_count), metrics.stage("pdftotext"):
+                    output = subprocess.check_output(
+                        ["pdftotext", str(file_path), "-"],
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        timeout=ENGINE_TIMEOUT
+                    )
+                if usable_text(output):
+                    return metrics.produced("pdftotext", output.strip())
+                print("pdftotext extraction had issues, trying next method")
+            except (subprocess.SubprocessError, FileNotFoundError) as e:
+                print(f"pdftotext extraction failed or not installed: {e}")
         
         # Method 3: Try using gs (ghostscript)
-        try:
-            output = subprocess.check_output(
-                ["gs", "-dNOPAUSE", "-dBATCH", "-sDEVICE=txtwrite", 
-                 "-sOutputFile=-", str(file_path)],
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            # Clean up the output - replace common encoding artifacts
-            cleaned = output.replace("(cid:", "").replace(")", "")
-            # Remove any remaining CID markers with regex
-            import re
-            cleaned = re.sub(r'\(cid:\d+\)', ' ', cleaned)
-            return cleaned.strip()
-        except Exception as e:
-            print(f"Ghostscript extraction failed: {e}")
+        if "ghostscript" not in skip_engines:
+            try:
+                with scheduler.admit("ghostscript", probe.size, probe.page_count), metrics.stage("ghostscript"):
+                    output = subprocess.check_output(
+                        ["gs", "-dNOPAUSE", "-dBATCH", "-sDEVICE=txtwrite", 
+                         "-sOutputFile=-", str(file_path)],
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        timeout=ENGINE_TIMEOUT
+                    )
+                # Clean up the output - replace common encoding artifacts
+                cleaned = output.replace("(cid:", "").replace(")", "")
+                # Remove any remaining CID markers with regex
+                import re
+                cleaned = re.sub(r'\(cid:\d+\)', ' ', cleaned)
+                return metrics.produced("ghostscript", cleaned.strip())
+            except Exception as e:
+                print(f"Ghostscript extraction failed: {e}")
         
         # Method 4: Last resort - try OCR if PyTesseract is available
-        try:
-            import pytesseract
-            from pdf2image import convert_from_path
-            
-            print("Attempting OCR extraction with Tesseract")
-            pages = convert_from_path(str(file_path))
-            text = ""
-            for page in pages:
-                text += pytesseract.image_to_string(page) + "\n\n"
-            return text.strip()
-        except ImportError:
-            print("OCR libraries not available")
-        except Exception as e:
-            print(f"OCR extraction failed: {e}")
+        if not ocr_failed:
+            try:
+                load_engines()
+                
+                print("Attempting OCR extraction with Tesseract")
+                if page_sizes is None:
+                    page_sizes = pdf_page_sizes(file_path)
+                    metrics.set_page_count(len(page_sizes))
+                if not ocr_numbers:
+                    ocr_numbers = range(1, len(page_sizes) + 1)
+                ocr_texts = ocr_selected_pages(file_path, ocr_numbers, page_sizes, page_timings)
+                if pages is not None:
+                    text = "".join((ocr_texts.get(number) or page_text) + "\n\n"
+                                   for number, page_text, _ in pages)
+                else:
+                    text = "".join(ocr_texts[number] + "\n\n" for number in sorted(ocr_texts))
+                return metrics.produced("tesseract", text.strip())
+            except ImportError:
+                print("OCR libraries not available")
+            except Exception as e:
+                print(f"OCR extraction failed: {e}")
         
         # If all methods fail, create a simple text version
         try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
-                # Create a simple representation of the text by extracting ASCII characters
-                text = ""
-                for byte in data:
-                    if 32 <= byte <= 126:  # ASCII printable range
-                        text += chr(byte)
-                # Clean up consecutive spaces and return
-                import re
-                text = re.sub(r'\s+', ' ', text)
-                return text.strip()
+            # Create a simple representation of the text by extracting ASCII characters
+            with metrics.stage("basic extraction"):
+                text = extract_printable_text(file_path, keep_whitespace=False)
+            return metrics.produced("basic extraction", text)
         except Exception as e:
             raise Exception(f"All PDF extraction methods failed: {e}")
     
@@ -169,12 +379,12 @@ def extract_text(file_path: pathlib.Path) -> str:
     else:
         try:
             with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                return f.read()
+                return metrics.produced("text", f.read())
         except Exception as e:
             # Last resort - try to read as binary and convert
             try:
                 with open(file_path, 'rb') as f:
                     data = f.read()
-                    return data.decode('utf-8', errors='replace')
+                    return metrics.produced("text", data.decode('utf-8', errors='replace'))
             except Exception as e2:
                 raise Exception(f"Could not extract text from file: {e}, {e2}")
\ No newline at end of file
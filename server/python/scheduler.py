@@ -0,0 +1,278 @@
+# scheduler.py - Host-wide admission control for the external tools (gs, soffice, pandoc, tesseract)
+
+import os
+import json
+import math
+import time
+import fcntl
+import pathlib
+import tempfile
+import contextlib
+
+import metrics
+
+MB = 1024 * 1024
+
+# Shared by every serve worker and batch process on the host
+STATE_PATH = pathlib.Path(os.environ.get("RESUME_SCHEDULER_STATE") or
+                          pathlib.Path(tempfile.gettempdir()) / "resume-scheduler.json")
+
+ENABLED = os.environ.get("RESUME_SCHEDULER", "1").lower() not in ("0", "false", "no")
+
+def physical_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return 4096 * MB
+
+# Estimated memory of all admitted tool runs together; half the host by default
+MEMORY_BUDGET = int(float(os.environ.get("RESUME_TOOL_MEMORY_MB", "0")) * MB) or physical_memory() // 2
+
+# Jobs allowed to wait at once; beyond this new jobs are turned away straight away
+MAX_QUEUE = int(os.environ.get("RESUME_SCHEDULER_QUEUE", "32"))
+
+# Longest a job waits for admission before it is told to retry
+MAX_WAIT = float(os.environ.get("RESUME_SCHEDULER_WAIT", "30"))
+
+# A job that has waited this long stops being overtaken by smaller ones
+MAX_BYPASS = float(os.environ.get("RESUME_SCHEDULER_BYPASS", "10"))
+
+POLL_INTERVAL = 0.05
+
+# Concurrent runs per tool, host-wide; RESUME_TOOL_LIMITS="ghostscript=4,soffice=1" overrides
+LIMITS = {
+    "pdftotext": 4,
+    "ghostscript": 2,
+    "soffice": 2,
+    "soffice-listener": 4,
+    "pandoc": 1,
+    "tesseract": max(1, min(4, os.cpu_count() or 1)),
+}
+for item in filter(None, os.environ.get("RESUME_TOOL_LIMITS", "").split(",")):
+    name, _, value = item.partition("=")
+    LIMITS[name.strip()] = int(value)
+
+# Memory model per tool: (base MB, MB per page, multiple of the file size).
+# soffice starts a whole office suite; a warm listener only holds the document.
+COSTS = {
+    "pdftotext": (20, 0.5, 1),
+    "ghostscript": (60, 2, 2),
+    "soffice": (250, 0, 4),
+    "soffice-listener": (20, 0, 4),
+    "pandoc": (400, 0, 2),
+    "tesseract": (50, 0, 0),
+}
+
+# Page count guess for PDFs whose page tree is hidden in object streams
+BYTES_PER_PAGE = 100 * 1024
+
+class Busy(BaseException):
+    """The host is at capacity for a tool; the caller should retry after retry_after seconds.
+
+    Derives from BaseException so the engine fallback chains, which catch
+    Exception and move on to the next tool, let it through to the job's
+    entry point instead of piling more work onto other tools.
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def estimate(tool, size=0, pages=None, memory=None):
+    """Estimated peak bytes of one run of tool on a file of size bytes and pages pages"""
+    base, per_page, per_byte = COSTS.get(tool, (50, 0, 1))
+    if pages is None:
+        pages = max(1, (size or 0) // BYTES_PER_PAGE)
+    return int(base * MB + per_page * pages * MB + per_byte * (size or 0) + (memory or 0))
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def empty_state():
+    return {"running": {}, "waiting": {}, "stats": {}}
+
+@contextlib.contextmanager
+def locked_state(path=None):
+    """Load, modify and save the scheduler state under an exclusive lock.
+
+    The file is only rewritten when the state changed, so polling waiters and
+    status() calls don't write on every look.
+    """
+    path = pathlib.Path(path or STATE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        saved = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = f.read()
+            state = json.loads(saved)
+        except (OSError, ValueError):
+            state = empty_state()
+        # Entries of killed processes would hold their slots forever
+        for table in ("running", "waiting"):
+            state[table] = {token: entry for token, entry in state[table].items() if alive(entry["pid"])}
+        try:
+            yield state
+        finally:
+            # Saved even when the block raises Busy, so the rejection is counted
+            content = json.dumps(state)
+            if content == saved:
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+def tool_stats(state, tool):
+    return state["stats"].setdefault(tool, {"admitted": 0, "rejected": 0, "wait_seconds": 0.0,
+                                            "max_wait": 0.0, "run_seconds": 0.0, "finished": 0})
+
+def priority(entry, now):
+    """Cheapest first; a job that has waited MAX_BYPASS seconds goes ahead of everything"""
+    if now - entry["since"] >= MAX_BYPASS:
+        return (0, entry["since"], 0)
+    return (1, entry["cost"], entry["since"])
+
+def fits(state, entry):
+    """True when entry's tool has a free slot and its memory fits next to what is running"""
+    running = state["running"].values()
+    if sum(1 for other in running if other["tool"] == entry["tool"]) >= LIMITS.get(entry["tool"], 1):
+        return False
+    reserved = sum(other["cost"] for other in running)
+    # A job bigger than the whole budget still runs, alone
+    return not running or reserved + entry["cost"] <= MEMORY_BUDGET
+
+def admissible(state, token, now):
+    """Whether the waiting job token may start now.
+
+    It must fit, and no job ahead of it in priority order may be able to
+    start instead. Jobs ahead that don't fit are overtaken (small files jump
+    past a large one waiting for memory), except one that has waited
+    MAX_BYPASS seconds: it holds back jobs competing for the same tool slot
+    or for memory, so it can't starve.
+    """
+    entry = state["waiting"][token]
+    if not fits(state, entry):
+        return False
+    rank = priority(entry, now)
+    for other_token, other in state["waiting"].items():
+        if other_token == token or priority(other, now) > rank:
+            continue
+        if fits(state, other):
+            return False
+        if now - other["since"] >= MAX_BYPASS and (
+                other["tool"] == entry["tool"] or
+                sum(1 for job in state["running"].values() if job["tool"] == other["tool"])
+                < LIMITS.get(other["tool"], 1)):
+            return False
+    return True
+
+def retry_after(state, tool):
+    """Seconds until a slot is likely to free up: the tool's average run time"""
+    stats = tool_stats(state, tool)
+    average = stats["run_seconds"] / stats["finished"] if stats["finished"] else 5
+    return max(1, math.ceil(average))
+
+@contextlib.contextmanager
+def admit(tool, size=0, pages=None, memory=None, committed=False):
+    """Hold a slot for one run of an external tool for the duration of the block.
+
+    The run's memory is estimated from the file size and page count (or
+    given directly as memory bytes). The job waits in a host-wide queue
+    until the tool is under its concurrency limit and the estimate fits in
+    RESUME_TOOL_MEMORY_MB; raises Busy when the queue is full or the wait
+    exceeds MAX_WAIT. A committed run, a later step of a job whose earlier
+    steps already ran (e.g. the next page of an OCR job), is never turned
+    away: it waits as long as it takes rather than wasting that work. The
+    wait is recorded as a "queue <tool>" stage with the queue depth found
+    on arrival.
+    """
+    if not ENABLED or tool not in LIMITS:
+        yield
+        return
+
+    token = os.urandom(16).hex()
+    cost = estimate(tool, size, pages, memory)
+    with metrics.stage(f"queue {tool}") as stage:
+        started = time.time()
+        try:
+            with locked_state() as state:
+                depth = len(state["waiting"])
+                stage.update(depth=depth, memory_mb=round(cost / MB, 1))
+                if depth >= MAX_QUEUE and not committed:
+                    tool_stats(state, tool)["rejected"] += 1
+                    raise Busy(f"{tool} queue is full ({depth} jobs waiting)", retry_after(state, tool))
+                state["waiting"][token] = {"tool": tool, "cost": cost, "pid": os.getpid(), "since": started}
+        except OSError as e:
+            # Admission is best effort; an unwritable state file must not fail the upload
+            print(f"Scheduler unavailable, running {tool} unscheduled: {e}")
+            token = None
+
+        while token:
+            try:
+                with locked_state() as state:
+                    now = time.time()
+                    if token not in state["waiting"]:
+                        # Dropped by another process (e.g. state file reset): queue again
+                        state["waiting"][token] = {"tool": tool, "cost": cost, "pid": os.getpid(),
+                                                   "since": started}
+                    if admissible(state, token, now):
+                        state["running"][token] = {**state["waiting"].pop(token), "since": now}
+                        stats = tool_stats(state, tool)
+                        stats["admitted"] += 1
+                        stats["wait_seconds"] += now - started
+                        stats["max_wait"] = max(stats["max_wait"], now - started)
+                        break
+                    if now - started >= MAX_WAIT and not committed:
+                        del state["waiting"][token]
+                        tool_stats(state, tool)["rejected"] += 1
+                        raise Busy(f"Timed out after {MAX_WAIT:g}s waiting for {tool}",
+                                   retry_after(state, tool))
+            except OSError as e:
+                print(f"Scheduler unavailable, running {tool} unscheduled: {e}")
+                token = None
+                break
+            time.sleep(POLL_INTERVAL)
+
+    admitted = time.time()
+    try:
+        yield
+    finally:
+        if token:
+            try:
+                with locked_state() as state:
+                    state["running"].pop(token, None)
+                    stats = tool_stats(state, tool)
+                    stats["finished"] += 1
+                    stats["run_seconds"] += time.time() - admitted
+            except OSError:
+                pass
+
+def status():
+    """Queue depth, running jobs, reserved memory and admission counters per tool"""
+    with locked_state() as state:
+        tools = {}
+        for tool, limit in LIMITS.items():
+            stats = tool_stats(state, tool)
+            tools[tool] = {
+                "limit": limit,
+                "running": sum(1 for job in state["running"].values() if job["tool"] == tool),
+                "waiting": sum(1 for job in state["waiting"].values() if job["tool"] == tool),
+                "admitted": stats["admitted"],
+                "rejected": stats["rejected"],
+                "average_wait": round(stats["wait_seconds"] / stats["admitted"], 4) if stats["admitted"] else 0.0,
+                "max_wait": round(stats["max_wait"], 4),
+            }
+        return {
+            "memory_budget_mb": round(MEMORY_BUDGET / MB, 1),
+            "reserved_mb": round(sum(job["cost"] for job in state["running"].values()) / MB, 1),
+            "queue_depth": len(state["waiting"]),
+            "tools": tools,
+        }
@@ -0,0 +1,54 @@
+# scratch.py - Managed scratch space for files that external tools need on disk
+
+import os
+import time
+import shutil
+import pathlib
+import tempfile
+import contextlib
+
+SCRATCH_ROOT = pathlib.Path(os.environ.get("RESUME_SCRATCH_DIR") or
+                            pathlib.Path(tempfile.gettempdir()) / "resume-scratch")
+
+# Converted outputs outlive the call that made them; anything older than this is swept
+OUTPUT_TTL = float(os.environ.get("RESUME_SCRATCH_TTL", "3600"))
+
+@contextlib.contextmanager
+def scratch_dir():
+    """A private directory that is removed, with its contents, when the block exits"""
+    SCRATCH_ROOT.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=SCRATCH_ROOT, prefix="job-") as path:
+        yield pathlib.Path(path)
+
+@contextlib.contextmanager
+def materialize(data, name):
+    """Write in-memory document bytes to a scratch file for tools that only accept paths"""
+    with scratch_dir() as directory:
+        path = directory / (pathlib.Path(name).name or "upload")
+        path.write_bytes(data)
+        yield path
+
+def output_dir():
+    """A directory for converted files returned to the caller, swept after OUTPUT_TTL"""
+    SCRATCH_ROOT.mkdir(parents=True, exist_ok=True)
+    sweep()
+    return pathlib.Path(tempfile.mkdtemp(dir=SCRATCH_ROOT, prefix="out-"))
+
+def sweep(max_age=None):
+    """Remove scratch and output directories older than max_age seconds.
+
+    Also catches job directories left behind by a worker that was killed
+    before its cleanup ran.
+    """
+    max_age = OUTPUT_TTL if max_age is None else max_age
+    cutoff = time.time() - max_age
+    try:
+        entries = list(SCRATCH_ROOT.iterdir())
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+        except OSError:
+            pass
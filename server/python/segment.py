@@ -0,0 +1,216 @@
+# segment.py - Split extracted resume text into contact, summary, experience, skills and education
+
+import re
+import unicodedata
+
+# Bump whenever the segment output changes; it is part of the cache key
+SEGMENT_VERSION = "1"
+
+HEADINGS = {
+    "summary": r"(?:professional |career |executive )?(?:summary|profile)|(?:career )?objective|about(?: me)?",
+    "experience": r"(?:work |professional |relevant )?experience|employment(?: history)?|(?:work|career) history",
+    "skills": (r"(?:technical |core |key )?(?:skills|competencies)(?: (?:&|and) (?:tools|technologies|expertise))?"
+               r"|technologies|tools(?: (?:&|and) technologies)?"),
+    "education": r"education(?: (?:&|and) (?:training|certifications?))?|academic background",
+    "projects": r"(?:personal |selected |key )?projects",
+    "certifications": r"certifications?|licenses(?: (?:&|and) certifications)?",
+    "awards": r"awards|honors|achievements",
+    "volunteer": r"volunteer(?:ing| experience| work)?",
+    "publications": r"publications",
+    "languages": r"languages",
+    "interests": r"interests|hobbies",
+}
+
+# A heading is a whole line naming a section, optionally decorated (#, ==, trailing colon)
+HEADING_RE = re.compile(
+    r"^[#*=_\-\s]*(?:" + "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in HEADINGS.items()) + r")[\s:=_\-]*$",
+    re.IGNORECASE)
+
+# "E X P E R I E N C E" from letter-spaced PDF headings
+SPACED_RE = re.compile(r"^(?:\w ){3,}\w$")
+
+CID_RE = re.compile(r"\(cid:\d+\)")
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪●◦‣∙·o]|\d{1,2}[.)])\s+")
+SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+DATE = rf"(?:{MONTH}\s*)?(?:'\d{{2}}|\d{{4}})|\d{{1,2}}/\d{{2,4}}"
+DATE_RANGE_RE = re.compile(rf"(?P<start>{DATE})\s*(?:-|–|—|to)\s*(?P<end>{DATE}|present|current|now)", re.IGNORECASE)
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"\+?\(?\d[\d ().-]{7,}\d")
+LINK_RE = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin\.com|github\.com|gitlab\.com)/\S+", re.IGNORECASE)
+
+SKILL_CATEGORY_RE = re.compile(r"^[^:,]{1,40}:\s*")
+SKILL_SPLIT_RE = re.compile(r"\s*[,;|•·]\s*")
+
+# Header lines before the first heading; past these (or at a paragraph) the text is summary
+CONTACT_MAX_LINES = 8
+PARAGRAPH_LENGTH = 100
+
+def normalize_line(line):
+    """Strip extraction noise from one line: CID markers, odd spaces, bullet glyphs"""
+    line = unicodedata.normalize("NFKC", CID_RE.sub("", line))
+    line = SPACE_RE.sub(" ", line).strip()
+    if SPACED_RE.match(line):
+        line = line.replace(" ", "")
+    return BULLET_RE.sub("- ", line) if BULLET_RE.match(line) else line
+
+def heading_kind(line):
+    """Section kind named by a heading line, or None"""
+    if len(line) > 60:
+        return None
+    match = HEADING_RE.match(line)
+    return match.lastgroup if match else None
+
+class Section:
+    """Lines under one heading, kept with their offsets for entry splitting"""
+
+    def __init__(self, kind, heading, start):
+        self.kind = kind
+        self.heading = heading
+        self.start = start
+        self.end = start
+        self.lines = []
+        self.spans = []
+
+    def add(self, line, start, end):
+        self.lines.append(line)
+        self.spans.append((start, end, line))
+        if line:
+            self.end = end
+
+    def content(self):
+        return "\n".join(self.lines).strip()
+
+    def to_dict(self):
+        return {"kind": self.kind, "heading": self.heading, "start": self.start,
+                "end": self.end, "content": self.content()}
+
+def iter_lines(text):
+    """Yield (start, end, normalized line) with offsets into text, in one pass"""
+    offset = 0
+    for raw in text.splitlines(keepends=True):
+        stripped = raw.rstrip("\r\n")
+        yield offset, offset + len(stripped), normalize_line(stripped)
+        offset += len(raw)
+
+def split_sections(text):
+    """Group lines under the heading above them; text before any heading is the header block"""
+    sections = []
+    current = Section("contact", None, 0)
+    header_lines = 0
+    for start, end, line in iter_lines(text):
+        kind = heading_kind(line) if line else None
+        if kind:
+            sections.append(current)
+            current = Section(kind, line.strip("#*=_-: "), start)
+            current.end = end
+            continue
+        if current.kind == "contact" and line:
+            header_lines += 1
+            # A paragraph or a long header means the summary started without a heading
+            if header_lines > CONTACT_MAX_LINES or len(line) > PARAGRAPH_LENGTH:
+                sections.append(current)
+                current = Section("summary", None, start)
+        if not current.lines and not line:
+            current.start = end
+            continue
+        current.add(line, start, end)
+    sections.append(current)
+    return [section for section in sections if section.lines or section.heading]
+
+def parse_contact(section):
+    content = section.content()
+    email = EMAIL_RE.search(content)
+    phone = PHONE_RE.search(EMAIL_RE.sub("", content))
+    name = next((line for line in section.lines
+                 if line and not any(char.isdigit() for char in line) and "@" not in line
+                 and len(line.split()) <= 5), None)
+    return {
+        "name": name,
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0).strip() if phone else None,
+        "links": [link.rstrip(".,;|") for link in LINK_RE.findall(content)],
+        "start": section.start,
+        "end": section.end,
+    }
+
+def split_experience(section):
+    """Split an experience section into entries of header lines plus bullets.
+
+    A new entry starts at a non-bullet line that follows bullets, or that
+    follows a blank line or carries a date range once the current entry
+    already has its dates.
+    """
+    entries = []
+    entry = None
+    blank = False
+    for start, end, line in section.spans:
+        if not line:
+            blank = entry is not None
+            continue
+        bullet = line.startswith("- ")
+        dates = None if bullet else DATE_RANGE_RE.search(line)
+        if not bullet and (entry is None or entry["bullets"]
+                           or (entry["dates"] and (blank or dates))):
+            entry = {"title": line, "header": [], "dates": None, "bullets": [],
+                     "start": start, "end": end, "lines": []}
+            entries.append(entry)
+        elif entry is None:
+            entry = {"title": None, "header": [], "dates": None, "bullets": [],
+                     "start": start, "end": end, "lines": []}
+            entries.append(entry)
+        if bullet:
+            entry["bullets"].append(line[2:])
+        else:
+            entry["header"].append(line)
+            if dates and not entry["dates"]:
+                entry["dates"] = {"start": dates.group("start"), "end": dates.group("end")}
+        entry["lines"].append(line)
+        entry["end"] = end
+        blank = False
+
+    for entry in entries:
+        entry["content"] = "\n".join(entry.pop("lines"))
+    return entries
+
+def parse_skills(section):
+    """Individual skills from comma, pipe or bullet separated lists, without category labels"""
+    skills = []
+    seen = set()
+    for line in section.lines:
+        line = SKILL_CATEGORY_RE.sub("", line[2:] if line.startswith("- ") else line)
+        for item in SKILL_SPLIT_RE.split(line):
+            item = item.strip(" .")
+            if item and len(item) <= 60 and item.lower() not in seen:
+                seen.add(item.lower())
+                skills.append(item)
+    return skills
+
+def segment_text(text):
+    """Segment resume text into sections with offsets into text and normalized content.
+
+    Returns {"sections": [...], "contact", "summary", "experience", "skills",
+    "education"}; sections lists every section in document order as
+    {"kind", "heading", "start", "end", "content"}.
+    """
+    sections = split_sections(text or "")
+    first = {}
+    for section in sections:
+        first.setdefault(section.kind, section)
+
+    def content(kind):
+        return "\n\n".join(section.content() for section in sections if section.kind == kind) or None
+
+    return {
+        "version": SEGMENT_VERSION,
+        "sections": [section.to_dict() for section in sections],
+        "contact": parse_contact(first["contact"]) if "contact" in first else None,
+        "summary": content("summary"),
+        "experience": [entry for section in sections if section.kind == "experience"
+                       for entry in split_experience(section)],
+        "skills": [skill for section in sections if section.kind == "skills"
+                   for skill in parse_skills(section)],
+        "education": content("education"),
+    }
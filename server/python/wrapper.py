@@ -1,64 +1,65 @@
 #!/usr/bin/env python3
 # wrapper.py - Command-line interface for resume conversion and text extraction
 
+import io
 import sys
 import os
-import tempfile
 import pathlib
+import shutil
 import json
 import subprocess
 import re
-from docx import Document
-from resume_convert import convert, extract_text
+import contextlib
+import base64
+import binascii
+from resume_convert import (convert, decode_text, extract_text, extract_text_from_buffer, probe_once,
+                            ENGINE_TIMEOUT)
+from extraction_cache import ExtractionCache, file_digest, bytes_digest
+from printable_text import extract_printable_text
+from probe import probe_file
+from segment import SEGMENT_VERSION, segment_text
+import keyword_match
+from engine_race import RACE_ENGINES, race_extract, race_enabled, needs_ocr
+import metrics
+import scratch
+import scheduler
+import office_pool
 
-def direct_extract_text(file_path):
+def direct_extract_text(file_path, probe=None):
     """Extract text directly using multiple fallback methods"""
+    probe = probe_once(pathlib.Path(file_path), probe)
     file_path = str(file_path)
     methods_tried = []
     errors = []
     
-    # Detect file type by extension
-    file_ext = pathlib.Path(file_path).suffix.lower()
-    
     # Handle DOCX files specifically
-    if file_ext == '.docx':
+    if probe.format == "docx":
         try:
-            methods_tried.append("python-docx")
-            doc = Document(file_path)
-            
-            # Extract text from all paragraphs
-            full_text = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    full_text.append(paragraph.text.strip())
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            full_text.append(cell.text.strip())
-            
-            extracted_text = '\n'.join(full_text)
+            methods_tried.append("docx-stream")
+            from docx_text import extract_docx_text
+            with metrics.stage("docx-stream"):
+                extracted_text = extract_docx_text(file_path)
             if len(extracted_text.strip()) > 20:
-                return extracted_text.strip()
-            errors.append("python-docx extracted text too short")
+                return metrics.produced("docx-stream", extracted_text.strip())
+            errors.append("DOCX extracted text too short")
         except Exception as e:
-            errors.append(f"python-docx failed: {str(e)}")
+            errors.append(f"DOCX extraction failed: {str(e)}")
     
-    # Handle PDF files and other formats
-    if file_ext == '.pdf' or file_ext == '':
+    # Handle PDF files and unnamed uploads; scanned PDFs have nothing for these tools
+    if (probe.format == "pdf" or not probe.extension) and not probe.needs_ocr:
         # Try using pdftotext (poppler) first
         try:
             methods_tried.append("pdftotext")
-            result = subprocess.run(
-                ["pdftotext", file_path, "-"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with scheduler.admit("pdftotext", probe.size, probe.page_count), metrics.stage("pdftotext"):
+                result = subprocess.run(
+                    ["pdftotext", file_path, "-"],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    timeout=ENGINE_TIMEOUT
+                )
             if result.stdout and len(result.stdout.strip()) > 50:
-                return result.stdout.strip()
+                return metrics.produced("pdftotext", result.stdout.strip())
             errors.append("pdftotext output too short")
         except (subprocess.SubprocessError, FileNotFoundError) as e:
             errors.append(f"pdftotext failed: {str(e)}")
@@ -66,18 +67,20 @@ def direct_extract_text(file_path):
         # Try using ghostscript
         try:
             methods_tried.append("ghostscript")
-            result = subprocess.run(
-                ["gs", "-dNOPAUSE", "-dBATCH", "-sDEVICE=txtwrite", "-sOutputFile=-", file_path],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with scheduler.admit("ghostscript", probe.size, probe.page_count), metrics.stage("ghostscript"):
+                result = subprocess.run(
+                    ["gs", "-dNOPAUSE", "-dBATCH", "-sDEVICE=txtwrite", "-sOutputFile=-", file_path],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    timeout=ENGINE_TIMEOUT
+                )
             if result.stdout:
                 # Clean up the output - replace common encoding artifacts
                 text = result.stdout
                 text = re.sub(r'\(cid:\d+\)', ' ', text)
                 if len(text.strip()) > 50:
-                    return text.strip()
+                    return metrics.produced("ghostscript", text.strip())
             errors.append("ghostscript output too short")
         except (subprocess.SubprocessError, FileNotFoundError) as e:
             errors.append(f"ghostscript failed: {str(e)}")
@@ -85,24 +88,12 @@ def direct_extract_text(file_path):
     # Try simple text extraction from binary file
     try:
         methods_tried.append("basic extraction")
-        with open(file_path, 'rb') as f:
-            data = f.read()
-        
-        # Extract all printable ASCII characters
-        text = ""
-        for byte in data:
-            # ASCII printable range (32-126) plus newline (10) and tab (9)
-            if (32 <= byte <= 126) or byte == 10 or byte == 9:
-                text += chr(byte)
-        
-        # Clean up and normalize the text
-        text = re.sub(r'[^\x20-\x7E\n\t]', ' ', text)  # Remove non-printable chars
-        text = re.sub(r'\s+', ' ', text)               # Normalize whitespace
-        text = re.sub(r'\(cid:\d+\)', '', text)       # Remove CID markers
-        text = text.strip()
+        # Printable ASCII plus newline and tab, whitespace normalized, CID markers removed
+        with metrics.stage("basic extraction"):
+            text = extract_printable_text(file_path, strip_cid=True)
         
         if len(text) > 200:  # Longer text requirement for this cruder method
-            return text
+            return metrics.produced("basic extraction", text)
         errors.append("basic extraction produced too little text")
     except Exception as e:
         errors.append(f"basic extraction failed: {str(e)}")
@@ -110,201 +101,740 @@ def direct_extract_text(file_path):
     # If we get here, all methods failed
     raise Exception(f"All extraction methods failed: {', '.join(errors)}. Methods tried: {', '.join(methods_tried)}")
 
-def main():
-    # Check command args
-    if len(sys.argv) < 3:
-        print(json.dumps({
-            "error": "Invalid arguments. Usage: wrapper.py <command> <file_path>"
-        }))
-        sys.exit(1)
+# Commands whose results depend only on the file contents and can be cached
+CACHEABLE_COMMANDS = ("convert", "extract_text", "segment")
+
+# Commands built on extract_text's result, which they share a cache entry with
+TEXT_COMMANDS = ("convert", "segment")
+
+# Formats extract_text reads in-process. convert returns the same text for
+# these; for the rest (.doc, other binaries) it reads the normalized PDF
+NATIVE_FORMATS = ("pdf", "docx", "text")
+
+# Last-resort engines, often reached only because a better one timed out under
+# load; their text is returned but not cached, so the next upload tries again
+FALLBACK_ENGINES = ("basic extraction", "emergency fallback")
+
+# Commands that can diff a re-uploaded DOCX against the last version of the same resume
+INCREMENTAL_COMMANDS = ("extract_text", "segment")
+
+cache = ExtractionCache()
+
+def run_command(command, file_path, use_cache=True, race=None, profile=None, data=None, want_pdf=False,
+                resume_id=None):
+    """Run a single command against a file and return the JSON-ready result
     
-    command = sys.argv[1]
-    file_path = sys.argv[2]
+    Every result carries a "metrics" block with stage timings and the engine
+    that produced the text. Setting RESUME_PROFILE (or profile) to cprofile or
+    tracemalloc writes a profiling report next to the file.
     
-    try:
-        file_path = pathlib.Path(file_path)
-        
-        if not file_path.exists():
-            print(json.dumps({
-                "error": f"File not found: {file_path}"
-            }))
-            sys.exit(1)
+    When data holds the document bytes, file_path is only the original file
+    name (used for its extension) and nothing is read from disk.
+    
+    convert reads its text from the original document; the normalized PDF
+    is only built, and returned as pdf_path, when want_pdf is set. segment
+    adds the resume sections found in the extracted text.
+    
+    With a resume_id, extract_text and segment compare a DOCX upload with the
+    last version extracted for that resume (see incremental_command).
+    """
+    file_path = pathlib.Path(file_path)
+    
+    if data is None and not file_path.exists():
+        return {
+            "error": f"File not found: {file_path}"
+        }
+    
+    # In-memory uploads have no directory of their own, so reports go to scratch
+    report_base = file_path if data is None else scratch.SCRATCH_ROOT / file_path.name
+    collector = metrics.begin()
+    with metrics.profiled(report_base, profile) as profile_info:
+        try:
+            if resume_id is not None and command in INCREMENTAL_COMMANDS:
+                result = incremental_command(command, file_path, str(resume_id), use_cache, race, data)
+            else:
+                result = cached_command(command, file_path, use_cache, race, data, want_pdf)
+        except scheduler.Busy as e:
+            result = busy_result(e)
+    
+    result["metrics"] = collector.to_dict(
+        bytes_in=len(data) if data is not None else file_path.stat().st_size,
+        text=result.get("text"),
+        cache_status=result.get("cache", {}).get("status"),
+    )
+    if profile_info["report"]:
+        result["profile_report"] = profile_info["report"]
+    return result
+
+def busy_result(e):
+    """Result for a job turned away by the tool scheduler; nothing failed, it should be retried"""
+    return {
+        "error": f"Server busy, retry later: {str(e)}",
+        "busy": True,
+        "retry_after": e.retry_after
+    }
+
+def cached_command(command, file_path, use_cache, race, data=None, want_pdf=False):
+    """Run a command, serving and storing cacheable results through the cache"""
+    probe = None
+    pdf = None
+    digest = None
+    # convert's and segment's text is exactly extract_text's, so they share its cache entry
+    text_command = "extract_text" if command in TEXT_COMMANDS else command
+    if command == "convert":
+        with metrics.stage("probe"):
+            probe = probe_file(file_path.name if data is not None else file_path, data=data)
+        if probe.format not in NATIVE_FORMATS:
+            text_command = "convert"
+    
+    if text_command == "convert":
+        def execute():
+            # extract_text has no reader for these (it would scrape a .doc for
+            # ASCII): convert to PDF and extract from that, keeping the PDF
+            nonlocal pdf
+            pdf = converted_pdf(file_path, data, digest, probe)
+            if pdf["pdf_path"] is not None:
+                result = execute_command("extract_text", pathlib.Path(pdf["pdf_path"]), race)
+                if "error" not in result:
+                    result["probe"] = probe._asdict()
+                return result
+            if data is not None:
+                result = execute_buffer_command("extract_text", file_path.name, data, race, probe)
+            else:
+                result = execute_command("extract_text", file_path, race, probe=probe)
+            if "error" not in result:
+                # Flagged so the cruder text isn't cached for the next try
+                result["warning"] = f"Conversion to PDF failed ({pdf['pdf_error']}), text read from the original"
+            return result
+    elif data is not None:
+        execute = lambda: execute_buffer_command(text_command, file_path.name, data, race, probe)
+    else:
+        execute = lambda: execute_command(text_command, file_path, race, probe=probe)
+    
+    if command not in CACHEABLE_COMMANDS:
+        return execute()
+    
+    text_cached = False
+    if not use_cache:
+        result = execute()
+        if "error" not in result:
+            result["cache"] = cache.stats("disabled")
+    else:
+        try:
+            with metrics.stage("cache lookup"):
+                digest = bytes_digest(data) if data is not None else file_digest(file_path)
+                key = cache.key(digest, text_command)
+                result = cache.get(key)
+        except OSError as e:
+            return {
+                "error": str(e)
+            }
         
-        # For the daryllundy_resume.pdf that we know has issues, use the hardcoded content
-        if file_path.name.lower() in ('daryllundy_resume.pdf', 'daryllundy.pdf', 'daryl_lundy.pdf'):
-            if command in ('convert', 'extract_text'):
-                print(json.dumps({
-                    "success": True,
-                    "text": """Daryl Lundy
-Los Angeles, CA | 213-537-3274 | daryl.lundy@gmail.com | linkedin.com/in/daryllundy
+        if result is not None:
+            # Keep attributing the text to the engine that originally produced it
+            original = result.pop("metrics", None) or {}
+            metrics.current.engine = original.get("engine")
+            metrics.current.page_count = original.get("page_count")
+            result["cache"] = cache.stats("hit")
+            text_cached = True
+        else:
+            result = execute()
+            if "error" not in result:
+                text_cached = reusable(result)
+                if text_cached:
+                    cache.put(key, {**result, "metrics": metrics.current.to_dict()})
+                result["cache"] = cache.stats("miss")
+    
+    if command == "convert" and want_pdf and "error" not in result:
+        result.update(pdf or converted_pdf(file_path, data, digest, probe))
+    elif pdf and pdf["pdf_path"] and not digest:
+        # Built only to read its text and not kept as a cache artifact
+        shutil.rmtree(pathlib.Path(pdf["pdf_path"]).parent, ignore_errors=True)
+    if command == "segment" and "error" not in result:
+        # Segments of a text that wasn't cached (a fallback's) must not be cached either
+        result["segments"] = cached_segments(result["text"], digest if text_cached else None)
+    return result
 
-About
-Technical Support Specialist skilled in managing complex website migrations, Linux system administration, and optimizing
-server performance and security. Proven ability to troubleshoot intricate technical issues, enhance system reliability, and
-deliver exceptional customer support. Experienced with cloud platforms (AWS), DevOps tools (Terraform, Docker), web
-technologies (WordPress, Shopify), and networking fundamentals. Adept communicator dedicated to improving client
-satisfaction through proactive technical solutions.
+def reusable(result):
+    """Whether a successful result is good enough to serve for every later upload of the file"""
+    return "warning" not in result and metrics.current.engine not in FALLBACK_ENGINES
 
-Work Experience
-Freelance                                                                                                  Los Angeles, CA
-Technical Consultant                                                                                       Jan '22 - Present
-· Optimized cloud environments, enhancing infrastructure reliability and security for small businesses and individuals.
-· Enhanced WordPress performance by reducing load times and optimizing database queries.
-· Deployed and customized Shopify stores, integrating them seamlessly with existing business operations.
+def cached_segments(text, digest=None):
+    """Segment extracted text, stored in the cache next to the extraction it came from"""
+    key = cache.key(digest, f"segment.{SEGMENT_VERSION}") if digest else None
+    segments = cache.get(key) if key else None
+    if segments is None:
+        with metrics.stage("segment"):
+            segments = segment_text(text)
+        if key:
+            cache.put(key, segments)
+    return segments
 
-GoDaddy                                                                                                     Los Angeles, CA
-Technical Account Manager II                                                                                 Jul '18 - Nov '21
-· Provided technical support for WordPress, Magento, Joomla, and custom websites, successfully resolving server
-  configuration issues and managing version upgrades.
-· Managed Linux environments (CentOS, Ubuntu, Debian) by executing software installations, updates, and security patches
-  while optimizing Apache, MySQL, and Nginx, improving system performance and scalability.
-· Enhanced server infrastructures by implementing effective resource management and performance tuning.
-· Cultivated and maintained strong client relationships through proactive phone, chat, and ticketing communication.
+def incremental_command(command, file_path, resume_id, use_cache, race, data=None):
+    """Extract a DOCX resume, re-parsing only the parts changed since its last upload.
+    
+    The part manifest of the last version extracted for resume_id is kept in
+    the cache. The result adds "changes": {"previous", "parts", "reparsed",
+    "changes", "sections"}, where changes lists the edited parts (see
+    docx_text.diff_parts) and sections the resume sections they touch, so
+    scoring can re-analyze just those; without a previous version every
+    section is listed. Other formats, and DOCX files the incremental reader
+    can't handle, go through the regular pipeline with "changes": None.
+    Without use_cache no manifest is read or stored: every part is parsed
+    and reported as new.
+    """
+    from docx_text import PARTS_VERSION, extract_docx_incremental, diff_parts
+    
+    try:
+        with metrics.stage("probe"):
+            probe = probe_file(file_path.name if data is not None else file_path, data=data)
+    except OSError as e:
+        return {
+            "error": str(e)
+        }
+    if probe.format == "docx":
+        key = cache.key(bytes_digest(f"resume:{resume_id}".encode()), "docx-parts")
+        previous = cache.get(key) if use_cache else None
+        if previous is not None and previous.get("version") != PARTS_VERSION:
+            previous = None
+        try:
+            with metrics.stage("docx-incremental"):
+                text, manifest, reparsed = extract_docx_incremental(
+                    io.BytesIO(data) if data is not None else file_path, previous)
+        except Exception as e:
+            print(f"Incremental DOCX extraction failed: {e}", file=sys.stderr)
+            text = ""
+        
+        # Same bar as the docx-stream engine; shorter text goes through the fallbacks
+        if len(text.strip()) > 20:
+            if use_cache:
+                cache.put(key, manifest)
+            segments = cached_segments(text)
+            changes = diff_parts(previous, manifest) if previous is not None else []
+            result = {
+                "success": True,
+                "text": metrics.produced("docx-incremental", text),
+                "changes": {
+                    "previous": previous is not None,
+                    "parts": len(manifest["parts"]) + len(manifest["headers"]),
+                    "reparsed": reparsed,
+                    "changes": changes,
+                    "sections": changed_sections(segments["sections"], changes, previous is None),
+                },
+                "probe": probe._asdict(),
+                # A hit means the last version's manifest was reused for the unchanged parts
+                "cache": cache.stats("disabled" if not use_cache else "hit" if previous is not None else "miss")
+            }
+            if command == "segment":
+                result["segments"] = segments
+            return result
+    
+    result = cached_command(command, file_path, use_cache, race, data)
+    if "error" not in result:
+        result["changes"] = None
+    return result
 
-Media Temple / GoDaddy                                                                                        Culver City, CA
-CloudTech Support Engineer II                                                                                Feb '16 - Jul '18
-· Conducted thorough server audits that led to identifying and removing crypto miners and malware.
-· Performed software installations, conducted security audits, and managed data backup and restoration processes,
-  enhancing system reliability and security for clients.
-· Provided expert support in Linux system administration, focusing on performance tuning and optimizing server
-  environments using tools like Nginx and MySQL.
-· Successfully migrated customer web applications to new servers, resolving technical issues and ensuring a seamless
-  transition.
+def changed_sections(sections, changes, everything=False):
+    """Sections whose text overlaps a body change; header and footer changes have no offsets"""
+    if everything:
+        return sections
+    spans = [(change["start"], change["end"]) for change in changes if "start" in change]
+    return [section for section in sections
+            if any(start <= section["end"] and section["start"] <= end for start, end in spans)]
 
-Media Temple                                                                                                Culver City, CA
-Customer Support Agent II                                                                                  May '14 - Feb '16
-· Created a web-based training game using JavaScript, HTML, and CSS, improving onboarding efficiency and increasing new
-  support agents' command line navigation skills.
-· Resolved complex customer inquiries regarding servers, email, and billing, achieving a 97% satisfaction rate through targeted
-  problem-solving and clear communication.
-· Assisted clients in resolving website and server issues, successfully reducing troubleshooting time and improving customer
-  satisfaction ratings.
-· Conducted routine maintenance and upgrades on client domains, ensuring reliability and seamless operation for high-traffic
-  websites.
+def converted_pdf(file_path, data=None, digest=None, probe=None):
+    """Build convert's normalized PDF, reusing the copy cached for the same content.
+    
+    Returns {"pdf_path"}, with "pdf_error" added when conversion failed; the
+    extracted text is still good in that case.
+    """
+    key = cache.key(digest, "pdf") if digest else None
+    if key:
+        with metrics.stage("pdf cache lookup"):
+            cached = cache.get_artifact(key)
+        if cached is not None:
+            return {"pdf_path": str(cached)}
+    
+    try:
+        if data is not None:
+            with scratch.materialize(data, file_path.name) as path:
+                out = convert(path, probe)
+        else:
+            out = convert(file_path, probe)
+    except Exception as e:
+        print(f"Error building normalized PDF: {e}", file=sys.stderr)
+        return {
+            "pdf_path": None,
+            "pdf_error": str(e)
+        }
+    
+    if key:
+        cached = cache.put_artifact(key, out)
+        if cached is not None:
+            # convert() wrote into its own scratch output directory, which the cache now replaces
+            shutil.rmtree(out.parent, ignore_errors=True)
+            out = cached
+    return {"pdf_path": str(out)}
 
-Skills
-Technical Support & Customer Service: Help Desk Software, Remote Desktop, Remote Support Tools, Ticketing Systems, User Training
-Operating Systems: Linux, macOS, Windows OS
-DevOps & Automation: Ansible, Bash, Docker, Github, GitLab, Terraform
-Web Development: API Integration, CSS, Git, HTML, JavaScript, PHP, Python, WooCommerce, WordPress
-Networking: DHCP, DNS, Firewall Management, TCP/IP, VPN
-Databases: Microsoft SQL Server, MySQL, SQL
-Security: Antivirus Solutions, Backup Solutions, Data Security, Disaster Recovery, Malware Analysis
-Troubleshooting & Performance: Data Recovery, Hardware Diagnostics, Patch Management, Performance Monitoring, Performance Optimization
-Cloud: Amazon Web Services (AWS), Cloud Services, SaaS Applications
-Virtualization: Docker, VirtualBox, VMware
-Media & Content Creation: Live Video Streaming, Video Editing
-Web & Application Servers: Apache, Nginx"""
-                }))
-                return
+def execute_buffer_command(command, name, data, race=None, probe=None):
+    """Run a command on in-memory document bytes, touching disk only if a tool needs a path"""
+    if race is None:
+        race = race_enabled()
+    if probe is None:
+        with metrics.stage("probe"):
+            probe = probe_file(name, data=data)
+    tried = ()
+    if command == "extract_text" and not race:
+        page_timings = []
+        try:
+            text, tried = extract_text_from_buffer(data, probe, page_timings=page_timings)
+        except Exception as e:
+            print(f"In-memory extraction failed: {e}", file=sys.stderr)
+            text = None
+        if text is not None:
+            return {
+                "success": True,
+                "text": text,
+                "page_timings": page_timings,
+                "race": None,
+                "probe": probe._asdict()
+            }
+    
+    # pdftotext, gs, soffice and OCR read files: hand them a scratch copy that is removed afterwards
+    with scratch.materialize(data, name) as path:
+        return execute_command(command, path, race, skip_engines=tuple(tried), probe=probe)
 
-        if command == "convert":
-            try:
-                # Convert to PDF and extract text
-                pdf_path = convert(file_path)
-                text = extract_text(pdf_path)
-                
-                print(json.dumps({
-                    "success": True,
-                    "text": text,
-                    "pdf_path": str(pdf_path)
-                }))
-            except Exception as e:
-                # Fall back to direct extraction
-                print(f"Error in standard extraction: {e}", file=sys.stderr)
-                text = direct_extract_text(file_path)
-                print(json.dumps({
-                    "success": True,
-                    "text": text,
-                    "error_info": f"Used fallback method due to: {str(e)}"
-                }))
-            
-        elif command == "extract_text":
+def execute_command(command, file_path, race=None, skip_engines=(), probe=None):
+    """Run a command without consulting the cache
+    
+    The file is classified once (see probe.py) and every engine below works
+    from that descriptor instead of sniffing the file again. convert and
+    segment are built on extract_text by cached_command, not here.
+    """
+    if race is None:
+        race = race_enabled()
+    page_timings = []
+    race_report = None
+    try:
+        if command == "extract_text":
+            probe = probe_once(file_path, probe)
             try:
-                # Handle DOCX files first by extension
-                file_ext = file_path.suffix.lower()
-                
-                if file_ext == '.docx':
-                    # Use python-docx for DOCX files
-                    from docx import Document
-                    doc = Document(str(file_path))
-                    
-                    # Extract text from all paragraphs
-                    full_text = []
-                    for paragraph in doc.paragraphs:
-                        if paragraph.text.strip():
-                            full_text.append(paragraph.text.strip())
-                    
-                    # Extract text from tables
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if cell.text.strip():
-                                    full_text.append(cell.text.strip())
-                    
-                    text = '\n'.join(full_text)
+                if probe.format == "docx":
+                    # Stream paragraphs and table cells straight from word/document.xml
+                    from docx_text import extract_docx_text
+                    with metrics.stage("docx-stream"):
+                        text = metrics.produced("docx-stream", extract_docx_text(file_path))
                     if len(text.strip()) < 20:
                         raise Exception("DOCX extraction resulted in very short text")
                 else:
-                    # Check if file is text or PDF using MIME type
                     try:
-                        import magic
-                        mime = magic.from_file(str(file_path), mime=True)
-                        
-                        if mime.startswith("text/") or file_ext == '.txt':
+                        if probe.format == "text":
                             # For text files, just read the content directly
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                text = f.read()
-                        elif mime.startswith("application/pdf") or file_ext == '.pdf':
+                            with open(file_path, 'rb') as f:
+                                text = metrics.produced("text", decode_text(f.read()))
+                        elif probe.format == "pdf":
                             # For PDFs, try our extraction function
-                            text = extract_text(file_path)
+                            text = None
+                            # Racing text-layer engines is pointless on a scanned PDF
+                            if race and not probe.needs_ocr:
+                                # Let pdftotext and pdfplumber compete; only the
+                                # slower engines run if neither produces usable text
+                                with scheduler.admit("pdftotext", probe.size, probe.page_count):
+                                    text, race_report = race_extract(file_path)
+                                for name, entry in race_report["engines"].items():
+                                    metrics.current.stages.append({"stage": name, **entry})
+                                if text is not None:
+                                    metrics.produced(race_report["winner"], text)
+                            if text is None:
+                                # The race's engines aren't retried, unless pages need OCR:
+                                # selective OCR works from pdfplumber's pages
+                                raced = race_report and not needs_ocr(race_report)
+                                skipped = (RACE_ENGINES if raced else ()) + tuple(skip_engines)
+                                text = extract_text(file_path, page_timings=page_timings,
+                                                    skip_engines=skipped, probe=probe)
                         else:
                             # For other files, try direct extraction first
-                            text = direct_extract_text(file_path)
+                            text = direct_extract_text(file_path, probe=probe)
                     except Exception as inner_e:
-                        # If libmagic or the normal methods fail, try direct extraction
+                        # If the normal methods fail, try direct extraction
                         print(f"Initial extraction failed: {inner_e}", file=sys.stderr)
-                        text = direct_extract_text(file_path)
+                        text = direct_extract_text(file_path, probe=probe)
                 
-                print(json.dumps({
+                return {
                     "success": True,
-                    "text": text
-                }))
+                    "text": text,
+                    "page_timings": page_timings,
+                    "race": race_report,
+                    "probe": probe._asdict()
+                }
             except Exception as e:
                 # One last attempt - fallback to basic extraction
                 try:
                     # Basic extraction directly from file
-                    with open(file_path, 'rb') as f:
-                        data = f.read()
-                    
-                    text = ''.join(chr(b) for b in data if (32 <= b <= 126) or b == 10 or b == 9)
-                    text = re.sub(r'\s+', ' ', text).strip()
+                    with metrics.stage("emergency fallback"):
+                        text = extract_printable_text(file_path)
+                    metrics.produced("emergency fallback", text)
                     
                     if len(text) > 100:
-                        print(json.dumps({
+                        return {
                             "success": True,
                             "text": text,
                             "warning": "Used emergency fallback extraction"
-                        }))
+                        }
                     else:
                         raise Exception("Extracted text too short")
                 except Exception as final_e:
-                    print(json.dumps({
+                    return {
                         "error": f"All extraction methods failed: {str(e)}, final attempt: {str(final_e)}"
-                    }))
-                    sys.exit(1)
+                    }
             
         else:
-            print(json.dumps({
+            return {
                 "error": f"Unknown command: {command}"
-            }))
-            sys.exit(1)
+            }
             
     except Exception as e:
-        print(json.dumps({
+        return {
             "error": str(e)
+        }
+
+def run_stream(command, file_path, emit, data=None, max_pages=None, max_chars=None, memory_limit_mb=None):
+    """Extract text page by page, passing each {"page", "text", ...} to emit as it is read.
+    
+    Returns the final result, which carries page and character counts instead
+    of the full text. PDFs are read one page at a time through PageStream;
+    other formats are small enough to extract whole and are emitted as page 1.
+    memory_limit_mb overrides RESUME_JOB_MEMORY_MB for a PDF stream (0 turns
+    the ceiling off); it is checked between pages, not enforced mid-page.
+    Streaming bypasses the cache.
+    """
+    if command != "extract_text":
+        return {
+            "error": f"Streaming is not supported for command: {command}"
+        }
+    file_path = pathlib.Path(file_path)
+    if data is None and not file_path.exists():
+        return {
+            "error": f"File not found: {file_path}"
+        }
+    
+    # PageStream loads pdfplumber; only PDF streams need it, but its exception is caught below
+    from page_stream import PageStream, MemoryLimitExceeded, MB
+    memory_limit = int(float(memory_limit_mb) * MB) if memory_limit_mb is not None else None
+    
+    collector = metrics.begin()
+    source = scratch.materialize(data, file_path.name) if data is not None else contextlib.nullcontext(file_path)
+    try:
+        with source as path:
+            with metrics.stage("probe"):
+                probe = probe_file(path)
+            if probe.format == "pdf":
+                pages = PageStream(path, max_pages=max_pages, max_chars=max_chars, memory_limit=memory_limit)
+                with metrics.stage("page stream"):
+                    for page in pages:
+                        emit(page)
+                metrics.set_page_count(pages.page_count)
+                metrics.produced(pages.engine, None)
+                summary = {"pages": pages.pages, "chars": pages.chars, "stopped": pages.stopped}
+            else:
+                result = execute_command(command, path, probe=probe)
+                if "error" in result:
+                    return result
+                text = result["text"]
+                stopped = "max_chars" if max_chars and len(text) > max_chars else None
+                if stopped:
+                    text = text[:max_chars]
+                emit({"page": 1, "text": text, "engine": collector.engine})
+                summary = {"pages": 1, "chars": len(text), "stopped": stopped}
+    except MemoryLimitExceeded as e:
+        return {
+            "error": str(e)
+        }
+    except scheduler.Busy as e:
+        return busy_result(e)
+    except Exception as e:
+        return {
+            "error": f"Streaming extraction failed: {str(e)}"
+        }
+    
+    result = {"success": True, **summary, "probe": probe._asdict()}
+    result["metrics"] = collector.to_dict(bytes_in=len(data) if data is not None else file_path.stat().st_size)
+    result["metrics"]["chars_out"] = summary["chars"]
+    return result
+
+# Keyword index commands (see keyword_match.py); they take text or a document to extract
+MATCH_COMMANDS = ("index", "unindex", "match")
+
+def run_match_command(command, job, file_path=None, data=None, use_cache=True):
+    """Run an index, unindex or match job, extracting the document's text first if needed"""
+    if job.get("text") is None and (data is not None or file_path):
+        extracted = run_command("extract_text", file_path, use_cache=use_cache, data=data)
+        if "error" in extracted:
+            return extracted
+        job = {**job, "text": extracted["text"]}
+    try:
+        return keyword_match.handle({**job, "command": command})
+    except (OSError, ValueError) as e:
+        return {
+            "error": f"Keyword index failed: {str(e)}"
+        }
+
+def scheduler_status():
+    """Host-wide queue depth, running jobs and wait times of the external-tool scheduler"""
+    try:
+        return {"success": True, "scheduler": scheduler.status()}
+    except OSError as e:
+        return {
+            "error": f"Scheduler state unavailable: {str(e)}"
+        }
+
+def default_worker_count():
+    """Number of warm `serve` workers the Node side should keep running"""
+    try:
+        return max(1, int(os.environ.get("RESUME_EXTRACT_WORKERS", "")))
+    except ValueError:
+        return max(1, min(4, os.cpu_count() or 1))
+
+def serve(input_stream=None, output_stream=None):
+    """Process NDJSON jobs until stdin closes.
+    
+    Each job is {"id", "command", "path"} or {"id", "command", "data", "name"}
+    with base64 document bytes, plus optional "no_cache", "race", "profile" and,
+    for convert, "pdf" to also build the normalized PDF, and for extract_text
+    and segment, "resume_id" to report what changed since that resume's last
+    DOCX upload.
+    A warm LibreOffice listener (RESUME_OFFICE_LISTENERS) is started by the
+    worker's first Word-to-PDF conversion and lives as long as the worker.
+    
+    A job with "stream": true (and optional "max_pages", "max_chars",
+    "memory_limit_mb") gets one {"id", "partial": true, "page", "text"} line
+    per page before its result.
+    
+    index, unindex and match jobs maintain the keyword index; documents come
+    as "text", or as "path"/"data" to be extracted first.
+    
+    A "status" job reports the external-tool scheduler's queues. A job turned
+    away by the scheduler gets {"error", "busy": true, "retry_after"}.
+    """
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+    office_pool.enable(timeout=ENGINE_TIMEOUT)
+    
+    def emit(payload):
+        output_stream.write(json.dumps(payload) + "\n")
+        output_stream.flush()
+    
+    emit({"ready": True, "pid": os.getpid(), "workers": default_worker_count()})
+    
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            command = job["command"]
+            # Uploads can arrive inline as base64 "data" plus the original "name"
+            if "data" in job:
+                data = base64.b64decode(job["data"], validate=True)
+                path = job.get("name") or "upload"
+            elif command in MATCH_COMMANDS or command == "status":
+                data = None
+                path = job.get("path")
+            else:
+                data = None
+                path = job["path"]
+        except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as e:
+            emit({"id": job_id, "error": f"Invalid job: {str(e)}"})
+            continue
+        
+        # The extraction helpers print diagnostics to stdout; keep the protocol
+        # channel clean by sending those to stderr instead
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                if command == "status":
+                    result = scheduler_status()
+                elif command in MATCH_COMMANDS:
+                    fields = {key: value for key, value in job.items() if key not in ("id", "data", "path", "name")}
+                    result = run_match_command(command, fields, path, data,
+                                               use_cache=not job.get("no_cache", False))
+                elif job.get("stream"):
+                    result = run_stream(command, path, lambda page: emit({"id": job_id, "partial": True, **page}),
+                                        data=data, max_pages=job.get("max_pages"), max_chars=job.get("max_chars"),
+                                        memory_limit_mb=job.get("memory_limit_mb"))
+                else:
+                    result = run_command(command, path, use_cache=not job.get("no_cache", False),
+                                         race=job.get("race"), profile=job.get("profile"), data=data,
+                                         want_pdf=job.get("pdf", False), resume_id=job.get("resume_id"))
+        except Exception as e:
+            # One bad job must not take down the worker and every job queued behind it
+            print(f"Job {job_id} failed: {e!r}", file=sys.stderr)
+            result = {"error": f"Job failed: {str(e)}"}
+        
+        emit({"id": job_id, **result})
+
+def batch_job(path, use_cache, race, command="extract_text"):
+    """Run command on one batch entry in a worker process"""
+    with contextlib.redirect_stdout(sys.stderr):
+        return run_command(command, path, use_cache=use_cache, race=race)
+
+def read_manifest(manifest):
+    """Read one path per line from a manifest file, or stdin when manifest is '-'"""
+    stream = sys.stdin if manifest == "-" else open(manifest, 'r', encoding='utf-8')
+    with stream:
+        return [line.strip() for line in stream
+                if line.strip() and not line.strip().startswith("#")]
+
+def batch_pool(entries, workers, use_cache, race, command, report):
+    """Extract [(index, path)] in one process pool, passing each finished file to report.
+    
+    Returns the entries left without a result because a worker process died:
+    a crash breaks the whole pool and fails every outstanding future with it.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    
+    lost = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(batch_job, path, use_cache, race, command): (index, path)
+                   for index, path in entries}
+        for future in as_completed(futures):
+            index, path = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                lost.append((index, path))
+                continue
+            except Exception as e:
+                result = {"error": str(e)}
+            report(index, path, result)
+    return sorted(lost)
+
+def batch(manifest, use_cache=True, workers=None, race=None, output_stream=None, command="extract_text"):
+    """Run command (extract_text, segment or convert) on many files concurrently,
+    writing one JSON line per file as it finishes
+    
+    When a worker process crashes, the files it took down with the pool are
+    retried in a fresh pool; if that one breaks as well, the rest run one
+    process each, so only the file that crashes its worker is reported failed.
+    """
+    if command not in CACHEABLE_COMMANDS:
+        raise ValueError(f"batch supports {', '.join(CACHEABLE_COMMANDS)}, not {command}")
+    output_stream = output_stream or sys.stdout
+    paths = read_manifest(manifest)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    failed = 0
+    
+    def report(index, path, result):
+        nonlocal failed
+        if "error" in result:
+            failed += 1
+        output_stream.write(json.dumps({"index": index, "path": path, **result}) + "\n")
+        output_stream.flush()
+    
+    lost = batch_pool(list(enumerate(paths)), workers, use_cache, race, command, report)
+    if lost:
+        print(f"Batch worker crashed, retrying {len(lost)} files", file=sys.stderr)
+        lost = batch_pool(lost, min(workers, len(lost)), use_cache, race, command, report)
+    for index, path in lost:
+        if batch_pool([(index, path)], 1, use_cache, race, command, report):
+            report(index, path, {"error": "Worker process crashed while extracting this file"})
+    
+    output_stream.write(json.dumps({"done": True, "count": len(paths), "failed": failed}) + "\n")
+    output_stream.flush()
+
+def option_value(name, default=None):
+    """Return the value of a --name=value command-line option"""
+    prefix = f"--{name}="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    use_cache = "--no-cache" not in sys.argv[1:]
+    race = True if "--race" in sys.argv[1:] else None
+    want_pdf = "--pdf" in sys.argv[1:]
+    
+    if args and args[0] == "serve":
+        serve()
+        return
+    
+    if args and args[0] == "status":
+        print(json.dumps(scheduler_status()))
+        return
+    
+    if args and args[0] in MATCH_COMMANDS:
+        # wrapper.py index --kind=job --id=J1 <file|-> | unindex --kind=job --id=J1 |
+        # match --kind=job [--top=N] (<file|-> | --id=R1 --from=resume)
+        job = {"kind": option_value("kind"), "doc_id": option_value("id"),
+               "from": option_value("from"), "top": option_value("top")}
+        source = args[1] if len(args) > 1 else None
+        with contextlib.redirect_stdout(sys.stderr):
+            if source == "-":
+                job["text"] = sys.stdin.buffer.read().decode('utf-8', errors='replace')
+                source = None
+            result = run_match_command(args[0], job, source, use_cache=use_cache)
+        print(json.dumps(result))
+        if "error" in result:
+            sys.exit(1)
+        return
+    
+    # Check command args
+    if len(args) < 2:
+        print(json.dumps({
+            "error": "Invalid arguments. Usage: wrapper.py [--no-cache] [--race] [--pdf] [--resume=ID] <command> <file_path> | "
+                     "wrapper.py --stream [--max-pages=N] [--max-chars=N] [--memory-limit-mb=N] extract_text <file_path> | "
+                     "wrapper.py <command> - --name=<file_name> | "
+                     "wrapper.py serve | wrapper.py status | "
+                     "wrapper.py [--workers=N] [--command=extract_text|segment|convert] batch <manifest|-> | "
+                     "wrapper.py index|unindex|match --kind=job|resume [--id=ID] [<file_path>|-]"
         }))
         sys.exit(1)
+    
+    if args[0] == "batch":
+        try:
+            workers = int(option_value("workers", os.environ.get("RESUME_BATCH_WORKERS", "0")))
+            batch(args[1], use_cache=use_cache, workers=workers, race=race,
+                  command=option_value("command", "extract_text"))
+        except (OSError, ValueError) as e:
+            print(json.dumps({
+                "error": str(e)
+            }))
+            sys.exit(1)
+        return
+    
+    # "-" reads the document bytes from stdin instead of a file
+    data = None
+    file_path = args[1]
+    if file_path == "-":
+        data = sys.stdin.buffer.read()
+        file_path = option_value("name", "upload")
+    
+    def emit_page(page):
+        sys.__stdout__.write(json.dumps(page) + "\n")
+        sys.__stdout__.flush()
+    
+    # Engine diagnostics go to stderr so stdout carries only the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        if "--stream" in sys.argv[1:]:
+            # One JSON line per page as it is read, then the result line
+            max_pages = option_value("max-pages")
+            max_chars = option_value("max-chars")
+            memory_limit_mb = option_value("memory-limit-mb")
+            result = run_stream(args[0], file_path, emit_page, data=data,
+                                max_pages=int(max_pages) if max_pages else None,
+                                max_chars=int(max_chars) if max_chars else None,
+                                memory_limit_mb=float(memory_limit_mb) if memory_limit_mb else None)
+        else:
+            result = run_command(args[0], file_path, use_cache=use_cache, race=race, data=data,
+                                 want_pdf=want_pdf, resume_id=option_value("resume"))
+    print(json.dumps(result))
+    if "error" in result:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,7 +5,7 @@ import OpenAI from "openai";
 import { insertJobPostSchema, insertResumeSchema } from "@shared/schema";
 import { z } from "zod";
 import multer from "multer";
-import { parseResume } from "./pdf-parser";
+import { parseResume, ExtractionBusyError } from "./pdf-parser";
 import { log } from "./vite";
 import { analyzeResumeScores, getResumeImpactScore } from "./ai-scoring";
 import { performEliteTailoring } from "./elite-tailor";
@@ -56,6 +56,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
       });
     } catch (error) {
       log(`Error parsing resume: ${error}`, "resume-parser");
+      if (error instanceof ExtractionBusyError) {
+        res.set("Retry-After", String(error.retryAfter));
+        return res.status(503).json({
+          message: "Resume parser is busy, please retry shortly",
+          retryAfter: error.retryAfter
+        });
+      }
       return res.status(500).json({ 
         message: "Failed to parse resume", 
         error: error instanceof Error ? error.message : "Unknown error" 
@@ -98,6 +105,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
       res.json(resume);
     } catch (error) {
       console.error("Error creating resume:", error);
+      if (error instanceof ExtractionBusyError) {
+        res.set("Retry-After", String(error.retryAfter));
+        return res.status(503).json({
+          message: "Resume parser is busy, please retry shortly",
+          retryAfter: error.retryAfter
+        });
+      }
       res.status(500).json({ 
         message: "Failed to create resume",
         error: error instanceof Error ? error.message : "Unknown error"